@@ -0,0 +1,390 @@
+"""
+Shared configuration and helpers for the agent modules
+
+Retry tiers, the model factory and the context cache settings live here so
+that tuning them (backoff, jitter, model choice) happens in one place.
+
+Every agent call also passes through a process-wide circuit breaker: once
+Gemini keeps failing with 429/5xx after retries, further calls fail fast with
+UpstreamUnavailable for a cool-down window instead of each one sitting through
+the full retry chain.
+
+Identical prompts sent to the same agent while one is already in flight are
+coalesced into a single upstream request (see run_isolated).
+"""
+import asyncio
+import time
+import uuid
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Union
+
+from google.adk.agents.context_cache_config import ContextCacheConfig
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events import Event
+from google.adk.models.google_llm import Gemini
+from google.adk.runners import InMemoryRunner
+from google import genai
+from google.genai import errors as genai_errors
+from google.genai import types
+
+from utils.cache import content_hash
+
+
+# Gemini model used by every agent
+MODEL_NAME = "gemini-2.0-flash-lite"  # Fast, lightweight Gemini model
+
+# Configure retry options for API resilience, per latency tier
+# - standard: up to 5 attempts, exponential backoff (base 7) from 1 second
+# - interactive: a user is waiting, so retry briefly and fail fast
+# - background: offline/bulk work, so retry patiently
+# - All tiers handle rate limiting (429) and server errors (500, 503, 504)
+# - jitter adds up to that many seconds of random delay to each backoff so
+#   concurrent callers that hit a 429 together do not retry in lockstep
+RETRY_PROFILES = {
+    "standard": types.HttpRetryOptions(
+        attempts=5,           # Maximum retry attempts
+        exp_base=7,          # Exponential backoff multiplier
+        initial_delay=1,     # Start with 1 second delay
+        jitter=0.25,         # Up to 0.25s of random extra delay
+        http_status_codes=[429, 500, 503, 504]  # Retryable status codes
+    ),
+    "interactive": types.HttpRetryOptions(
+        attempts=3,           # Give up quickly - a user is waiting
+        exp_base=2,
+        initial_delay=0.5,
+        max_delay=4,
+        jitter=0.125,
+        http_status_codes=[429, 500, 503, 504]
+    ),
+    "background": types.HttpRetryOptions(
+        attempts=8,           # Be patient - nobody is waiting on the result
+        exp_base=2,
+        initial_delay=2,
+        max_delay=120,
+        jitter=0.5,
+        http_status_codes=[429, 500, 503, 504]
+    ),
+}
+
+# Default retry options (standard tier)
+RETRY_CONFIG = RETRY_PROFILES["standard"]
+
+# Context caching for static system instructions
+# Each agent's instruction is identical on every request, so ADK keeps it in
+# a Gemini context cache and bills those tokens at the cached rate. The cache
+# is recreated after ttl_seconds or after cache_intervals invocations.
+CONTEXT_CACHE_CONFIG = ContextCacheConfig(
+    min_tokens=1024,       # Skip caching for requests too small to qualify
+    ttl_seconds=3600,      # Recreate the cache hourly
+    cache_intervals=100    # ...or after this many invocations
+)
+
+# User ID for one-shot agent calls (each call gets its own throwaway session)
+AGENT_USER_ID = "agent_user"
+
+# Server-sent events: the model's text arrives as partial events while it is
+# still being generated
+_STREAMING_RUN_CONFIG = RunConfig(streaming_mode=StreamingMode.SSE)
+
+
+class UpstreamUnavailable(RuntimeError):
+    """Raised without calling Gemini while the circuit breaker is open."""
+
+
+def _is_upstream_failure(exc: BaseException) -> bool:
+    """Return True for errors that mean Gemini itself is unhealthy (429/5xx)."""
+    if isinstance(exc, genai_errors.ServerError):
+        return True
+    return isinstance(exc, genai_errors.ClientError) and exc.code == 429
+
+
+class CircuitBreaker:
+    """
+    Fail fast while the upstream model API is unhealthy.
+
+    Closed: calls go through; consecutive upstream failures are counted.
+    Open: after fail_max consecutive failures, calls raise UpstreamUnavailable
+        immediately for reset_timeout seconds.
+    Half-open: after the timeout, one trial call is let through. Success
+        closes the breaker, another upstream failure re-opens it.
+
+    Only 429/5xx errors (as surfaced after the model's own retries) count as
+    failures; bad prompts or parsing errors do not trip the breaker.
+
+    Attributes:
+        fail_max (int): Consecutive failures that open the breaker
+        reset_timeout (float): Seconds to stay open before a trial call
+    """
+
+    def __init__(self, fail_max: int = 5, reset_timeout: float = 30.0):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """Current state: "closed", "open" or "half_open"."""
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def _before_call(self) -> bool:
+        """
+        Raise UpstreamUnavailable unless a call may go through now.
+
+        Returns:
+            bool: True if this call is the half-open trial call
+        """
+        if self._opened_at is None:
+            return False
+        remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+        if remaining > 0 or self._trial_in_flight:
+            raise UpstreamUnavailable(
+                f"Gemini is unavailable (circuit open, retry in {max(remaining, 0):.0f}s)"
+            )
+        self._trial_in_flight = True
+        return True
+
+    def _record_success(self) -> None:
+        if self._opened_at is not None:
+            print("[OK] Gemini circuit closed")
+        self._failures = 0
+        self._opened_at = None
+
+    def _record_failure(self, exc: BaseException) -> None:
+        if not _is_upstream_failure(exc):
+            return
+        self._failures += 1
+        if self._opened_at is not None or self._failures >= self.fail_max:
+            self._opened_at = time.monotonic()
+            print(f"[ERROR] Gemini circuit open for {self.reset_timeout:.0f}s after: {exc}")
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """
+        Wrap one upstream call.
+
+        Raises:
+            UpstreamUnavailable: If the breaker is open
+
+        Example:
+            >>> with UPSTREAM_BREAKER.guard():
+            ...     events = await runner.run_debug(prompt)
+        """
+        trial = self._before_call()
+        try:
+            yield
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        else:
+            self._record_success()
+        finally:
+            if trial:
+                self._trial_in_flight = False
+
+
+# Process-wide breaker shared by every agent (they all call the same API)
+UPSTREAM_BREAKER = CircuitBreaker(fail_max=5, reset_timeout=30.0)
+
+
+# One Gemini model per retry tier, shared by every agent on that tier
+_models: Dict[str, Gemini] = {}
+
+
+def make_model(tier: str = "standard") -> Gemini:
+    """
+    Return the Gemini model using the retry profile for the given tier.
+
+    Models are created once per tier and shared. Each Gemini instance owns
+    its GenAI client (and that client's HTTP connection pool), so agents on
+    the same tier reuse open connections instead of each paying for its own
+    TLS handshakes.
+
+    Args:
+        tier (str): Key of RETRY_PROFILES ("standard", "interactive" or
+                    "background"). Defaults to "standard".
+
+    Returns:
+        Gemini: Model configured with the tier's retry options
+    """
+    model = _models.get(tier)
+    if model is None:
+        model = _models[tier] = Gemini(model=MODEL_NAME, retry_options=RETRY_PROFILES[tier])
+    return model
+
+
+def _part_texts(event: Event) -> List[str]:
+    """Return the non-empty text parts of an event."""
+    if not (event.content and event.content.parts):
+        return []
+    return [text for text in (getattr(part, 'text', None) for part in event.content.parts) if text]
+
+
+def final_text(events: List[Event]) -> str:
+    """
+    Return the text of the agent's final response.
+
+    Scans from the end so only the last text-bearing event is joined, instead
+    of overwriting a result string for every part of every event.
+
+    Args:
+        events (List[Event]): Events returned by run_isolated
+
+    Returns:
+        str: Joined text parts of the final response ("" if there is none)
+    """
+    for event in reversed(events):
+        texts = _part_texts(event)
+        if texts:
+            return "".join(texts)
+    return ""
+
+
+# Shared GenAI client for direct API calls (Files API, Batch Mode), created
+# on first use
+_genai_client: Optional[genai.Client] = None
+
+
+def get_genai_client() -> genai.Client:
+    """Return the shared GenAI client (reads credentials set by config)."""
+    global _genai_client
+    if _genai_client is None:
+        _genai_client = genai.Client()
+    return _genai_client
+
+
+def _as_content(prompt: Union[str, types.Content]) -> types.Content:
+    """Wrap a text prompt as a user message; pass Content through unchanged."""
+    if isinstance(prompt, types.Content):
+        return prompt
+    return types.Content(role="user", parts=[types.Part(text=prompt)])
+
+
+# In-flight agent calls keyed by content_hash(app name, prompt)
+_in_flight: Dict[str, "asyncio.Task[List[Event]]"] = {}
+
+
+async def _run_in_session(runner: InMemoryRunner, prompt: Union[str, types.Content]) -> List[Event]:
+    """Run a prompt in a fresh session, deleting the session afterwards."""
+    session_id = f"call_{uuid.uuid4().hex}"
+    await runner.session_service.create_session(
+        app_name=runner.app_name,
+        user_id=AGENT_USER_ID,
+        session_id=session_id
+    )
+    try:
+        with UPSTREAM_BREAKER.guard():
+            return [
+                event async for event in runner.run_async(
+                    user_id=AGENT_USER_ID,
+                    session_id=session_id,
+                    new_message=_as_content(prompt)
+                )
+            ]
+    finally:
+        await runner.session_service.delete_session(
+            app_name=runner.app_name,
+            user_id=AGENT_USER_ID,
+            session_id=session_id
+        )
+
+
+async def run_isolated(runner: InMemoryRunner, prompt: Union[str, types.Content]) -> List[Event]:
+    """
+    Run a single prompt on a shared runner in a fresh session.
+
+    Runners are created once per agent and reused, so every call gets its own
+    session to keep one request's conversation out of the next. The session is
+    deleted afterwards so the in-memory session store does not grow.
+
+    If the same prompt is already running on the same agent (a double-clicked
+    button, a client retrying after a timeout), the caller waits for that
+    request instead of sending, and paying for, a duplicate one.
+
+    Args:
+        runner (InMemoryRunner): Module-level runner for the agent
+        prompt (Union[str, types.Content]): User prompt to send, either as
+            text or as a prepared message (e.g. one referencing an uploaded file)
+
+    Returns:
+        List[Event]: Events produced by the agent for this prompt
+
+    Raises:
+        UpstreamUnavailable: If the circuit breaker is open
+    """
+    key = content_hash(
+        runner.app_name,
+        prompt.model_dump(mode="json", exclude_none=True) if isinstance(prompt, types.Content) else prompt
+    )
+    task = _in_flight.get(key)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(_run_in_session(runner, prompt))
+        _in_flight[key] = task
+
+        def _forget(done: asyncio.Task) -> None:
+            if _in_flight.get(key) is done:
+                del _in_flight[key]
+
+        task.add_done_callback(_forget)
+    else:
+        print("[Joining identical in-flight request]")
+
+    # Shield so one caller being cancelled does not cancel the shared request
+    return await asyncio.shield(task)
+
+
+async def stream_isolated(runner: InMemoryRunner, prompt: str) -> AsyncIterator[str]:
+    """
+    Run a single prompt on a shared runner and yield text as it is generated.
+
+    Same session handling as run_isolated, but the agent runs in SSE streaming
+    mode so the caller can show the first tokens without waiting for the full
+    response.
+
+    Args:
+        runner (InMemoryRunner): Module-level runner for the agent
+        prompt (str): User prompt to send
+
+    Yields:
+        str: Text chunks in generation order
+
+    Raises:
+        UpstreamUnavailable: If the circuit breaker is open
+    """
+    session_id = f"call_{uuid.uuid4().hex}"
+    await runner.session_service.create_session(
+        app_name=runner.app_name,
+        user_id=AGENT_USER_ID,
+        session_id=session_id
+    )
+    try:
+        with UPSTREAM_BREAKER.guard():
+            streamed = False
+            async for event in runner.run_async(
+                user_id=AGENT_USER_ID,
+                session_id=session_id,
+                new_message=types.Content(role="user", parts=[types.Part(text=prompt)]),
+                run_config=_STREAMING_RUN_CONFIG
+            ):
+                if event.partial:
+                    for text in _part_texts(event):
+                        streamed = True
+                        yield text
+                elif event.is_final_response():
+                    # The final event repeats the aggregated text; only use it if
+                    # the model did not stream (e.g. served from a non-SSE backend)
+                    if not streamed:
+                        for text in _part_texts(event):
+                            yield text
+                    break
+    finally:
+        await runner.session_service.delete_session(
+            app_name=runner.app_name,
+            user_id=AGENT_USER_ID,
+            session_id=session_id
+        )
@@ -0,0 +1,168 @@
+"""
+Gemini Batch Mode Runner
+
+Submits many independent prompts as a single Gemini Batch job instead of one
+interactive request per prompt. Batch jobs are billed at half the standard
+rate and do not count against the interactive rate limits, so bulk workloads
+(a folder of lab reports, nightly re-interpretation) no longer stall on 429
+backoff. The trade-off is latency: results are only available once the whole
+job completes (target turnaround is within 24 hours, usually much sooner).
+
+Interactive paths (chat, single PDF upload) keep using the ADK runners in the
+individual agent modules.
+
+Workflow:
+1. Write one JSONL line per prompt: {"key": ..., "request": {...}}
+2. Upload the JSONL file through the Files API
+3. Create the batch job and poll until it reaches a terminal state
+4. Download the results file and map each response back by key
+
+Note: Batch Mode with file input is available on the Gemini Developer API
+(GOOGLE_GENAI_USE_VERTEXAI=0). Vertex AI batch prediction reads from Cloud
+Storage or BigQuery instead and is not supported here.
+"""
+import sys
+import os
+import orjson
+import asyncio
+import tempfile
+from pathlib import Path
+from typing import List, Union
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+import config  # Load API keys and environment variables
+from agents._common import MODEL_NAME, get_genai_client
+from google.genai import types
+
+
+# Model used for batch jobs (same model as the interactive agents)
+BATCH_MODEL = MODEL_NAME
+
+# How often to poll the batch job status
+POLL_INTERVAL_SECONDS = 30
+
+# Job states after which polling stops
+_TERMINAL_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
+
+
+def _response_text(response: dict) -> str:
+    """Concatenate the text parts of the first candidate in a batch response."""
+    candidates = response.get("candidates") or []
+    if not candidates:
+        raise ValueError("Batch response contained no candidates")
+    parts = (candidates[0].get("content") or {}).get("parts") or []
+    text = "".join(part.get("text", "") for part in parts)
+    if not text:
+        raise ValueError("Batch response contained no text")
+    return text
+
+
+async def run_batch_job(
+    prompts: List[str],
+    system_instruction: str,
+    display_name: str
+) -> List[Union[str, Exception]]:
+    """
+    Run prompts through a single Gemini Batch job and return the responses.
+
+    Args:
+        prompts (List[str]): User prompts, one per request
+        system_instruction (str): System instruction applied to every request
+        display_name (str): Human-readable name for the uploaded file and job
+
+    Returns:
+        List[Union[str, Exception]]: One entry per prompt, in input order.
+            Successful entries are the response text; failed entries are a
+            ValueError describing the per-request error.
+
+    Raises:
+        ValueError: If Vertex AI is configured (file-based batch unsupported)
+        RuntimeError: If the job fails, is cancelled, or expires
+    """
+    if not prompts:
+        return []
+
+    if config.GOOGLE_GENAI_USE_VERTEXAI:
+        raise ValueError(
+            "Batch Mode with file input requires the Gemini Developer API. "
+            "Set GOOGLE_GENAI_USE_VERTEXAI=0 to use bulk processing."
+        )
+
+    client = get_genai_client()
+
+    # Step 1: Write the JSONL request file
+    with tempfile.NamedTemporaryFile("wb", suffix=".jsonl", delete=False) as f:
+        for i, prompt in enumerate(prompts):
+            line = {
+                "key": f"req_{i}",
+                "request": {
+                    "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+                    "system_instruction": {"parts": [{"text": system_instruction}]},
+                },
+            }
+            f.write(orjson.dumps(line) + b"\n")
+        requests_path = f.name
+
+    # Step 2: Upload the request file
+    try:
+        uploaded = await client.aio.files.upload(
+            file=requests_path,
+            config=types.UploadFileConfig(display_name=display_name, mime_type="jsonl"),
+        )
+    finally:
+        os.unlink(requests_path)
+
+    # Steps 3-4: Run the job and download its results; the uploaded request
+    # file is deleted afterwards whether or not the job succeeded
+    try:
+        # Step 3: Create the job and poll until it finishes
+        job = await client.aio.batches.create(
+            model=BATCH_MODEL,
+            src=uploaded.name,
+            config=types.CreateBatchJobConfig(display_name=display_name),
+        )
+        print(f"[Batch job submitted: {job.name} ({len(prompts)} requests)]")
+
+        while job.state.name not in _TERMINAL_STATES:
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+            job = await client.aio.batches.get(name=job.name)
+
+        if job.state.name != "JOB_STATE_SUCCEEDED":
+            raise RuntimeError(f"Batch job {job.name} ended in state {job.state.name}: {job.error}")
+
+        # Step 4: Download results and map them back to the original order
+        content = await asyncio.to_thread(client.files.download, file=job.dest.file_name)
+    finally:
+        try:
+            await client.aio.files.delete(name=uploaded.name)
+        except Exception as e:
+            print(f"[WARN] Could not delete batch input file {uploaded.name}: {e}")
+
+    by_key = {}
+    for raw_line in content.splitlines():
+        if raw_line.strip():
+            entry = orjson.loads(raw_line)
+            by_key[entry.get("key")] = entry
+
+    results: List[Union[str, Exception]] = []
+    for i in range(len(prompts)):
+        entry = by_key.get(f"req_{i}")
+        if entry is None:
+            results.append(ValueError(f"No result returned for request {i}"))
+        elif "response" not in entry:
+            results.append(ValueError(f"Request {i} failed: {entry.get('error') or entry.get('status')}"))
+        else:
+            try:
+                results.append(_response_text(entry["response"]))
+            except ValueError as e:
+                results.append(e)
+
+    print(f"[OK] Batch job {job.name} complete")
+    return results
@@ -0,0 +1,168 @@
+"""
+Combined Extract + Interpret Agent
+
+For the common "report in, interpretation out" pipeline nobody inspects the
+intermediate JSON, yet the two-agent flow pays for two model round-trips and
+sends the extracted data back to the model a second time. This agent does
+both jobs in one call: it returns the structured extraction and the
+patient-facing interpretation together in a single JSON response.
+
+Key Features:
+- One Gemini call per report instead of two (extractor + interpreter)
+- Same extraction schema validation as the extractor agent
+- System instruction combines both roles once and is context-cached
+- Same medical disclaimer as the interpreter agent
+
+The separate extractor and interpreter agents remain the reference path for
+debugging, admin tools, and any flow that needs the JSON before interpreting.
+"""
+import sys
+from pathlib import Path
+from typing import Dict, Any
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+import config  # Load API keys and environment variables
+from google.adk.agents import LlmAgent
+from google.adk.apps import App
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+from jsonschema import Draft7Validator
+
+from agents._common import CONTEXT_CACHE_CONFIG, make_model, run_isolated, final_text
+from agents.extractor_agent import (
+    EXTRACTION_SCHEMA_DICT,
+    EXTRACTOR_INSTRUCTION,
+    _build_extraction_prompt,
+    _parse_extraction_response,
+)
+from agents.interpreter_agent import INTERPRETER_INSTRUCTION, DISCLAIMER_BLOCK
+
+
+# Schema of the combined response: the extraction plus the interpretation text
+COMBINED_SCHEMA_DICT = {
+    "type": "object",
+    "required": ["structured", "interpretation"],
+    "properties": {
+        "structured": EXTRACTION_SCHEMA_DICT,
+        "interpretation": {"type": "string", "minLength": 1},
+    },
+}
+
+# Validator is built once at import time and reused for every report
+_COMBINED_VALIDATOR = Draft7Validator(COMBINED_SCHEMA_DICT)
+
+
+# System instruction: both roles, followed by the combined output contract
+COMBINED_INSTRUCTION = f"""You perform two tasks on each medical lab report, in order.
+
+TASK 1 - EXTRACTION
+{EXTRACTOR_INSTRUCTION}
+
+TASK 2 - INTERPRETATION
+Using the data you extracted in Task 1, write the patient-facing interpretation.
+{INTERPRETER_INSTRUCTION}
+
+FINAL OUTPUT FORMAT (overrides the output instructions above):
+Return ONE JSON object with exactly two keys:
+- "structured": the extraction object from Task 1
+- "interpretation": the full markdown interpretation from Task 2, as a string
+Return ONLY this JSON object, no other text.
+"""
+
+
+# Create the combined agent (standard tier, JSON output enforced by the API)
+combined_agent = LlmAgent(
+    name="health_report_combined",
+    model=make_model("standard"),
+    description="Extracts and interprets a lab report in a single call",
+    static_instruction=types.Content(parts=[types.Part(text=COMBINED_INSTRUCTION)]),
+    generate_content_config=types.GenerateContentConfig(
+        response_mime_type="application/json"
+    ),
+)
+
+# App wraps the agent with context caching of its static instruction
+combined_app = App(
+    name="health_report_combined",
+    root_agent=combined_agent,
+    context_cache_config=CONTEXT_CACHE_CONFIG
+)
+
+# Runner is built once and shared by every call (each call runs in its own
+# throwaway session, see run_isolated)
+_runner = InMemoryRunner(app=combined_app)
+
+
+async def extract_and_interpret(report_text: str) -> Dict[str, Any]:
+    """
+    Extract structured data and interpret it in a single model call.
+
+    Args:
+        report_text (str): Raw text extracted from PDF or input directly
+
+    Returns:
+        Dict[str, Any]: Dictionary containing:
+            - structured_data: Same structure as extract_from_text() returns
+            - interpretation: Same text as interpret_lab_results() returns,
+              including the medical disclaimer
+
+    Raises:
+        ValueError: If the agent returns no response, invalid JSON, or JSON
+                    that does not match COMBINED_SCHEMA_DICT
+
+    Example:
+        >>> result = await extract_and_interpret(report_text)
+        >>> print(result['structured_data']['patient']['name'])
+        >>> print(result['interpretation'])
+    """
+    prompt = _build_extraction_prompt(report_text)
+
+    # Run the agent asynchronously
+    print("[Extracting and interpreting report in one call...]")
+    response = await run_isolated(_runner, prompt)
+
+    # Validate that we got a response
+    json_text = final_text(response)
+    if not json_text:
+        raise ValueError("No response from combined agent")
+
+    combined = _parse_extraction_response(json_text, validator=_COMBINED_VALIDATOR)
+    print("[OK] Extraction and interpretation complete")
+
+    # Append mandatory medical disclaimer for legal compliance
+    return {
+        "structured_data": combined["structured"],
+        "interpretation": combined["interpretation"] + DISCLAIMER_BLOCK,
+    }
+
+
+async def extract_and_interpret_pdf(pdf_path: str) -> Dict[str, Any]:
+    """
+    Extract and interpret a PDF lab report in a single model call.
+
+    Args:
+        pdf_path (str): Path to the PDF lab report file
+
+    Returns:
+        Dict[str, Any]: Same structure as extract_and_interpret()
+
+    Raises:
+        FileNotFoundError: If PDF file doesn't exist
+        ValueError: If the combined response is invalid
+    """
+    # Import PDF utility (lazy import to avoid circular dependencies)
+    from tools.pdf_utils import extract_text_from_pdf
+
+    print(f"[Reading PDF: {pdf_path}]")
+    pdf_data = extract_text_from_pdf(pdf_path)
+    print(f"   Pages: {pdf_data['page_count']}")
+    print(f"   Method: {pdf_data['method']}")
+
+    return await extract_and_interpret(pdf_data['full_text'])
+
+
+if __name__ == "__main__":
+    print("Combined Agent Module Loaded")
+    print(f"Agent: {combined_agent.name}")
@@ -11,6 +11,8 @@ Key Features:
 - Identifies abnormal results (HIGH, LOW, ABNORMAL flags)
 - Groups tests by category (CBC, Metabolic Panel, etc.)
 - Handles both PDF files and raw text input
+- Bulk extraction through Gemini Batch Mode for offline workloads
+- Concurrent multi-PDF extraction with bounded parallelism
 
 Architecture:
 - LLM-powered extraction using Gemini 2.0 Flash Lite
@@ -19,30 +21,39 @@ Architecture:
 - Supports both PDF and raw text input
 """
 import sys
+import io
+import re
+import asyncio
+import atexit
+import itertools
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
+from typing import AsyncIterator, Dict, Any, Iterator, List, Optional, Union
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
 import config  # Load API keys and environment variables
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
+from google.adk.apps import App
 from google.adk.runners import InMemoryRunner
 from google.genai import types
-import json
-
-
-# Configure retry options for API resilience
-# - Retries up to 5 times for transient failures
-# - Uses exponential backoff (base 7) starting at 1 second
-# - Handles rate limiting (429) and server errors (500, 503, 504)
-retry_config = types.HttpRetryOptions(
-    attempts=5,           # Maximum retry attempts
-    exp_base=7,          # Exponential backoff multiplier
-    initial_delay=1,     # Start with 1 second delay
-    http_status_codes=[429, 500, 503, 504]  # Retryable status codes
-)
+import orjson
+from jsonschema import Draft7Validator
+
+from agents._common import CONTEXT_CACHE_CONFIG, make_model, run_isolated, final_text, get_genai_client
+from utils.cache import TTLCache, content_hash
+
+
+# Process pool for CPU-bound PDF parsing in bulk workflows (created on first
+# use). Workers are spawned rather than forked: forking the multithreaded
+# app/server process is unsafe. PyMuPDF cannot be used from several threads,
+# so a thread pool is not an option.
+MAX_PDF_WORKERS = 4
+_pdf_pool: Optional[ProcessPoolExecutor] = None
 
 
 # Define the target JSON schema for extracted data
@@ -84,18 +95,61 @@ EXTRACTION_SCHEMA = """
 """
 
 
-# Create the Extractor Agent using Google's Gemini model
-# This is a specialized LLM agent configured to extract medical data
-# Model choice: gemini-2.0-flash-lite for fast, cost-effective extraction
-# Part of multi-agent healthcare analysis system
-extractor_agent = LlmAgent(
-    name="health_report_extractor",
-    model=Gemini(
-        model="gemini-2.0-flash-lite",  # Fast, lightweight Gemini model
-        retry_options=retry_config       # Configured retry behavior
-    ),
-    description="Extracts structured medical data from lab reports",
-    instruction=f"""You are a precise medical data extractor. Your job is to extract information from medical lab reports and structure it into valid JSON.
+# Machine-checkable version of EXTRACTION_SCHEMA, used to validate every
+# extraction before it reaches downstream code. Fields the model may not find
+# in a report are allowed to be null.
+_NULLABLE_STRING = {"type": ["string", "null"]}
+_NULLABLE_OBJECT = {"type": ["object", "null"]}
+EXTRACTION_SCHEMA_DICT = {
+    "type": "object",
+    "required": ["patient", "tests"],
+    "properties": {
+        "patient": {
+            "type": "object",
+            "properties": {
+                "name": _NULLABLE_STRING,
+                "dob": _NULLABLE_STRING,
+                "gender": _NULLABLE_STRING,
+                "patient_id": _NULLABLE_STRING,
+                "age": {"type": ["number", "string", "null"]},
+            },
+        },
+        "clinic": _NULLABLE_OBJECT,
+        "report_info": _NULLABLE_OBJECT,
+        "tests": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["name", "result"],
+                "properties": {
+                    "category": _NULLABLE_STRING,
+                    "name": {"type": "string"},
+                    "result": {"type": ["string", "number", "null"]},
+                    "unit": _NULLABLE_STRING,
+                    "reference_range": _NULLABLE_STRING,
+                    "flag": _NULLABLE_STRING,
+                },
+            },
+        },
+        "comments": _NULLABLE_STRING,
+        "summary": _NULLABLE_STRING,
+    },
+}
+
+# Validator is built once at import time and reused for every report
+_EXTRACTION_VALIDATOR = Draft7Validator(EXTRACTION_SCHEMA_DICT)
+
+# Appended to the prompt when the first response fails validation
+_RETRY_ADDENDUM = (
+    "\n\nYour previous response could not be used: {error}\n"
+    "Fix these errors and return ONLY the corrected JSON object."
+)
+
+
+# System instruction for the extractor
+# Shared by the interactive agent and the Batch Mode path (extract_from_texts)
+# so both produce output in the same format
+EXTRACTOR_INSTRUCTION = f"""You are a precise medical data extractor. Your job is to extract information from medical lab reports and structure it into valid JSON.
 
 STRICT RULES:
 1. Output ONLY valid JSON - no explanations, no markdown, no extra text
@@ -115,11 +169,146 @@ STRICT RULES:
 7. Create a brief summary highlighting abnormal values
 
 IMPORTANT: Your output must be parseable by JSON.parse(). No extra formatting.
-""",
+"""
+
+
+# Create the Extractor Agent using Google's Gemini model
+# This is a specialized LLM agent configured to extract medical data
+# Model choice: gemini-2.0-flash-lite for fast, cost-effective extraction
+# Part of multi-agent healthcare analysis system
+extractor_agent = LlmAgent(
+    name="health_report_extractor",
+    model=make_model("standard"),
+    description="Extracts structured medical data from lab reports",
+    static_instruction=types.Content(parts=[types.Part(text=EXTRACTOR_INSTRUCTION)]),
+)
+
+# Same extractor on the background retry profile, for offline/bulk ingestion
+background_extractor_agent = LlmAgent(
+    name="health_report_extractor_background",
+    model=make_model("background"),
+    description="Extracts structured medical data from lab reports (offline)",
+    static_instruction=types.Content(parts=[types.Part(text=EXTRACTOR_INSTRUCTION)]),
+)
+
+# Apps wrap each agent with context caching of its static instruction
+extractor_app = App(
+    name="health_report_extractor",
+    root_agent=extractor_agent,
+    context_cache_config=CONTEXT_CACHE_CONFIG
+)
+background_extractor_app = App(
+    name="health_report_extractor_background",
+    root_agent=background_extractor_agent,
+    context_cache_config=CONTEXT_CACHE_CONFIG
+)
+
+# Runners are built once and shared by every call (each call runs in its own
+# throwaway session, see run_isolated)
+_runner = InMemoryRunner(app=extractor_app)
+_background_runner = InMemoryRunner(app=background_extractor_app)
+
+
+# Static parts of the per-report prompt, built once at import time
+_PROMPT_PREFIX = "Extract structured data from this medical lab report:\n\n```\n"
+_PROMPT_SUFFIX = "\n```\n\nReturn ONLY the JSON object, no other text."
+
+
+def _build_extraction_prompt(report_text: str) -> str:
+    """Build the per-report user prompt sent alongside EXTRACTOR_INSTRUCTION."""
+    return _PROMPT_PREFIX + report_text + _PROMPT_SUFFIX
+
+
+# Large reports are uploaded once through the Files API and referenced by URI,
+# so retries and repeat ingests do not resend the text inline
+# - Only on the Gemini Developer API (Vertex AI has no Files API upload)
+# - Gemini deletes uploaded files after 48 hours, so handles are forgotten
+#   an hour before that
+LARGE_REPORT_CHARS = 100_000
+_uploaded_reports = TTLCache(maxsize=256, ttl_seconds=47 * 3600)
+_FILE_PROMPT_TEXT = (
+    "Extract structured data from the attached medical lab report.\n\n"
+    "Return ONLY the JSON object, no other text."
 )
 
 
-async def extract_from_text(report_text: str) -> Dict[str, Any]:
+async def _build_file_prompt(report_text: str) -> types.Content:
+    """Upload the report text (once per content) and reference it in the prompt."""
+    key = content_hash(report_text)
+    file_uri = _uploaded_reports.get(key)
+    if file_uri is None:
+        print(f"[Uploading large report ({len(report_text)} chars) through the Files API...]")
+        uploaded = await get_genai_client().aio.files.upload(
+            file=io.BytesIO(report_text.encode("utf-8")),
+            config=types.UploadFileConfig(mime_type="text/plain", display_name=f"lab-report-{key[:12]}")
+        )
+        file_uri = uploaded.uri
+        _uploaded_reports[key] = file_uri
+
+    return types.Content(role="user", parts=[
+        types.Part.from_uri(file_uri=file_uri, mime_type="text/plain"),
+        types.Part(text=_FILE_PROMPT_TEXT),
+    ])
+
+
+def _with_feedback(prompt: Union[str, types.Content], error: Exception) -> Union[str, types.Content]:
+    """Append validation feedback to a text or file-based prompt."""
+    feedback = _RETRY_ADDENDUM.format(error=error)
+    if isinstance(prompt, types.Content):
+        return types.Content(role="user", parts=[*prompt.parts, types.Part(text=feedback)])
+    return prompt + feedback
+
+
+# Markdown code fence the model sometimes wraps its JSON in (```json ... ```);
+# the closing fence is optional in case the response was cut short
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*(?:```\s*)?$", re.DOTALL)
+
+
+def _parse_extraction_response(
+    json_text: str,
+    validator: Draft7Validator = _EXTRACTION_VALIDATOR
+) -> Dict[str, Any]:
+    """
+    Parse a raw extractor response into structured data.
+
+    Args:
+        json_text (str): Model output, optionally wrapped in markdown fences
+        validator (Draft7Validator): Schema to check the parsed JSON against.
+            Defaults to the extraction schema.
+
+    Returns:
+        Dict[str, Any]: Parsed structured data
+
+    Raises:
+        ValueError: If the response is not valid JSON or does not match
+                    EXTRACTION_SCHEMA_DICT
+    """
+    # Clean up the JSON response (LLMs sometimes wrap JSON in markdown)
+    fence = _FENCE_RE.match(json_text)
+    json_text = fence.group(1) if fence else json_text.strip()
+
+    # Parse and validate JSON structure
+    try:
+        structured_data = orjson.loads(json_text)
+    except orjson.JSONDecodeError as e:
+        # Log error details for debugging
+        print(f"[ERROR] Failed to parse JSON: {e}")
+        print(f"Raw response: {json_text[:500]}...")
+        raise ValueError(f"Invalid JSON response from agent: {e}")
+
+    # Check the shape so downstream code can trust the structure
+    errors = [
+        f"{'/'.join(map(str, error.absolute_path)) or '<root>'}: {error.message}"
+        for error in validator.iter_errors(structured_data)
+    ]
+    if errors:
+        print(f"[ERROR] Extracted data failed schema validation: {errors[:5]}")
+        raise ValueError(f"Extracted data does not match schema: {'; '.join(errors[:5])}")
+
+    return structured_data
+
+
+async def extract_from_text(report_text: str, background: bool = False) -> Dict[str, Any]:
     """
     Extract structured data from lab report text using the LLM agent.
 
@@ -130,6 +319,9 @@ async def extract_from_text(report_text: str) -> Dict[str, Any]:
     Args:
         report_text (str): Raw text extracted from PDF or input directly.
                           Can contain unstructured lab report data.
+        background (bool): Use the background retry profile for offline/bulk
+                          work where nobody is waiting on the result.
+                          Defaults to False (standard profile).
 
     Returns:
         Dict[str, Any]: Structured dictionary containing:
@@ -141,8 +333,8 @@ async def extract_from_text(report_text: str) -> Dict[str, Any]:
             - summary: AI-generated summary of key findings
 
     Raises:
-        ValueError: If agent returns no response or invalid JSON
-        json.JSONDecodeError: If response cannot be parsed as JSON
+        ValueError: If agent returns no response, or returns invalid or
+                    schema-violating JSON twice in a row
 
     Example:
         >>> text = "Patient: John Doe\\nCRP: 27.0 mg/L (High)"
@@ -150,59 +342,94 @@ async def extract_from_text(report_text: str) -> Dict[str, Any]:
         >>> print(data['patient']['name'])
         'John Doe'
     """
-    # Create runner for the agent (manages agent execution lifecycle)
-    runner = InMemoryRunner(agent=extractor_agent)
+    # Reuse the shared runner for the selected retry profile
+    runner = _background_runner if background else _runner
 
     # Build the extraction prompt with clear instructions
-    prompt = f"""Extract structured data from this medical lab report:
-
-```
-{report_text}
-```
-
-Return ONLY the JSON object, no other text."""
+    if len(report_text) >= LARGE_REPORT_CHARS and not config.GOOGLE_GENAI_USE_VERTEXAI:
+        prompt = await _build_file_prompt(report_text)
+    else:
+        prompt = _build_extraction_prompt(report_text)
 
     # Run the agent asynchronously
     print("[Extracting structured data from report...]")
-    response = await runner.run_debug(prompt)
-
-    # Extract the JSON text from the agent's response
-    # Response is a stream of events; we need the final text content
-    json_text = None
-    for event in response:
-        if event.content and event.content.parts:
-            for part in event.content.parts:
-                if hasattr(part, 'text') and part.text:
-                    json_text = part.text
-                    break  # Found the text, exit inner loop
+    response = await run_isolated(runner, prompt)
+
+    # Extract the JSON text from the agent's final response
+    json_text = final_text(response)
 
     # Validate that we got a response
     if not json_text:
         raise ValueError("No response from extractor agent")
 
-    # Clean up the JSON response (LLMs sometimes wrap JSON in markdown)
-    json_text = json_text.strip()
-    if json_text.startswith('```json'):
-        json_text = json_text[7:]  # Remove opening ```json
-    if json_text.startswith('```'):
-        json_text = json_text[3:]   # Remove opening ```
-    if json_text.endswith('```'):
-        json_text = json_text[:-3]  # Remove closing ```
-    json_text = json_text.strip()
-
-    # Parse and validate JSON structure
     try:
-        structured_data = json.loads(json_text)
-        print("[OK] Successfully extracted structured data")
-        return structured_data
-    except json.JSONDecodeError as e:
-        # Log error details for debugging
-        print(f"[ERROR] Failed to parse JSON: {e}")
-        print(f"Raw response: {json_text[:500]}...")
-        raise ValueError(f"Invalid JSON response from agent: {e}")
+        structured_data = _parse_extraction_response(json_text)
+    except ValueError as e:
+        # Malformed output: retry once, telling the model what was wrong,
+        # rather than passing bad data on to the interpreter
+        print("[Retrying extraction with validation feedback...]")
+        response = await run_isolated(runner, _with_feedback(prompt, e))
+        json_text = final_text(response)
+        if not json_text:
+            raise ValueError("No response from extractor agent")
+        structured_data = _parse_extraction_response(json_text)
+
+    print("[OK] Successfully extracted structured data")
+    return structured_data
+
+
+async def extract_from_texts(report_texts: List[str]) -> List[Union[Dict[str, Any], Exception]]:
+    """
+    Extract structured data from many lab reports in one Gemini Batch job.
+
+    Intended for bulk/offline ingestion (a folder of reports, nightly
+    re-processing). Batch jobs are billed at half the interactive rate and
+    do not consume the interactive rate-limit budget, at the cost of
+    latency: results arrive when the whole job completes. Interactive
+    callers should keep using extract_from_text().
+
+    Args:
+        report_texts (List[str]): Raw report texts, one per report
 
+    Returns:
+        List[Union[Dict[str, Any], Exception]]: One entry per input, in the
+            same order. Successful entries are the same structured dictionary
+            returned by extract_from_text(); failed entries are the exception
+            describing why that report could not be extracted.
 
-async def extract_from_pdf(pdf_path: str) -> Dict[str, Any]:
+    Raises:
+        RuntimeError: If the batch job itself fails, is cancelled, or expires
+
+    Example:
+        >>> results = await extract_from_texts([text_a, text_b])
+        >>> ok = [r for r in results if not isinstance(r, Exception)]
+    """
+    # Lazy import: batch mode is only needed by bulk workflows
+    from agents.batch_runner import run_batch_job
+
+    prompts = [_build_extraction_prompt(text) for text in report_texts]
+    responses = await run_batch_job(
+        prompts,
+        system_instruction=EXTRACTOR_INSTRUCTION,
+        display_name="health-report-extraction",
+    )
+
+    results: List[Union[Dict[str, Any], Exception]] = []
+    for response in responses:
+        if isinstance(response, Exception):
+            results.append(response)
+            continue
+        try:
+            results.append(_parse_extraction_response(response))
+        except ValueError as e:
+            results.append(e)
+
+    succeeded = sum(1 for r in results if not isinstance(r, Exception))
+    print(f"[OK] Batch extraction complete: {succeeded}/{len(results)} reports")
+    return results
+
+
+async def extract_from_pdf(pdf_path: str, background: bool = False) -> Dict[str, Any]:
     """
     Extract structured data from a PDF lab report file.
 
@@ -213,6 +440,7 @@ async def extract_from_pdf(pdf_path: str) -> Dict[str, Any]:
     Args:
         pdf_path (str): Absolute or relative path to the PDF file.
                        Example: "./reports/patient_lab_results.pdf"
+        background (bool): Use the background retry profile (see extract_from_text)
 
     Returns:
         Dict[str, Any]: Same structured dictionary as extract_from_text().
@@ -237,7 +465,252 @@ async def extract_from_pdf(pdf_path: str) -> Dict[str, Any]:
     print(f"   Method: {pdf_data['method']}")  # Shows which PDF library was used
 
     # Step 2: Send extracted text to AI agent for structured extraction
-    return await extract_from_text(pdf_data['full_text'])
+    return await extract_from_text(pdf_data['full_text'], background=background)
+
+
+# Page batch size for streamed extraction of long PDFs
+PAGES_PER_BATCH = 4
+
+# Page batches being extracted at once by extract_from_pdf_stream
+MAX_CONCURRENT_BATCHES = 8
+
+
+async def extract_from_pdf_stream(
+    pdf_path: str,
+    pages_per_batch: int = PAGES_PER_BATCH,
+    max_concurrent: int = MAX_CONCURRENT_BATCHES
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Extract a PDF lab report in page batches, yielding each batch when ready.
+
+    Up to max_concurrent batches are extracted at once and yielded in
+    completion order, so a consumer can work on the first batch while later
+    pages are still being extracted (agents.pipeline merges them before
+    interpreting the whole report). A new batch is
+    only started after a finished one has been handed to the consumer, so a
+    consumer that stops pulling also stops further extraction calls.
+    Reports that fit in one batch produce a single result, same as
+    extract_from_pdf().
+
+    Args:
+        pdf_path (str): Path to the PDF lab report file
+        pages_per_batch (int): Pages sent to the extractor per call
+        max_concurrent (int): Most batches being extracted at once
+
+    Yields:
+        Dict[str, Any]: Structured data for one batch of pages. When the
+            report is split, each batch carries a "page_range" [first, last]
+            (1-based) and patient/clinic details may be missing from batches
+            that do not contain them; combine batches with merge_extractions().
+
+    Raises:
+        FileNotFoundError: If PDF file doesn't exist
+        ValueError: If a batch cannot be extracted
+    """
+    # Import PDF utility (lazy import to avoid circular dependencies)
+    from tools.pdf_utils import extract_text_from_pdf
+
+    print(f"[Reading PDF: {pdf_path}]")
+    pdf_data = extract_text_from_pdf(pdf_path)
+    pages = pdf_data['pages']
+    print(f"   Pages: {pdf_data['page_count']}")
+    print(f"   Method: {pdf_data['method']}")
+
+    if len(pages) <= pages_per_batch:
+        yield await extract_from_text(pdf_data['full_text'])
+        return
+
+    starts = range(0, len(pages), pages_per_batch)
+    print(f"   Extracting in {len(starts)} batches of up to {pages_per_batch} pages")
+
+    async def _extract_batch(start: int) -> Dict[str, Any]:
+        end = min(start + pages_per_batch, len(pages))
+        batch = await extract_from_text("\n\n".join(pages[start:end]))
+        batch["page_range"] = [start + 1, end]
+        return batch
+
+    remaining = iter(starts)
+    pending = set()
+
+    def _start_batches() -> None:
+        # Top up the in-flight batches to max_concurrent
+        for start in itertools.islice(remaining, max_concurrent - len(pending)):
+            pending.add(asyncio.ensure_future(_extract_batch(start)))
+
+    try:
+        _start_batches()
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+            _start_batches()
+    finally:
+        # Consumer stopped early or a batch failed: don't leave calls running
+        for task in pending:
+            task.cancel()
+
+
+def merge_extractions(batches: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge per-batch extraction results into one structured report.
+
+    Args:
+        batches (List[Dict[str, Any]]): Results from extract_from_pdf_stream()
+
+    Returns:
+        Dict[str, Any]: Same structure as extract_from_text() returns. Batches
+            are put back in page order; the first non-empty patient, clinic
+            and report_info win; tests are concatenated; comments and
+            summaries are joined.
+    """
+    if len(batches) == 1:
+        return batches[0]
+
+    batches = sorted(batches, key=lambda b: b.get('page_range', [0]))
+    merged: Dict[str, Any] = {"tests": []}
+    for key in ('patient', 'clinic', 'report_info'):
+        merged[key] = next((b[key] for b in batches if b.get(key)), {})
+    for batch in batches:
+        merged["tests"].extend(batch.get('tests') or [])
+    for key in ('comments', 'summary'):
+        merged[key] = " ".join(b[key] for b in batches if b.get(key))
+    return merged
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Return the shared process pool used for CPU-bound PDF parsing."""
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=min(MAX_PDF_WORKERS, os.cpu_count() or 1),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        atexit.register(_pdf_pool.shutdown, cancel_futures=True)
+    return _pdf_pool
+
+
+async def extract_many(
+    pdf_paths: List[str],
+    concurrency: int = 8
+) -> List[Union[Dict[str, Any], Exception]]:
+    """
+    Extract structured data from many PDF lab reports concurrently.
+
+    PDF parsing runs in a process pool (at most MAX_PDF_WORKERS spawned
+    workers) so it spreads across CPU cores, and
+    up to `concurrency` extraction calls are in flight against the Gemini
+    API at once. Extraction uses the background retry profile since this is
+    a bulk workflow.
+
+    Args:
+        pdf_paths (List[str]): Paths to the PDF files
+        concurrency (int): Maximum number of concurrent extraction calls.
+                          Defaults to 8.
+
+    Returns:
+        List[Union[Dict[str, Any], Exception]]: One entry per input path, in
+            the same order. Successful entries are the structured dictionary
+            returned by extract_from_text(); failed entries are the exception
+            raised while processing that file.
+
+    Example:
+        >>> results = await extract_many(["a.pdf", "b.pdf", "c.pdf"])
+        >>> ok = [r for r in results if not isinstance(r, Exception)]
+    """
+    # Import PDF utility (lazy import to avoid circular dependencies)
+    from tools.pdf_utils import extract_text_from_pdf
+
+    loop = asyncio.get_running_loop()
+    pool = _get_pdf_pool()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one(pdf_path: str) -> Dict[str, Any]:
+        # Parsing is bounded by the pool size; only the LLM call is throttled
+        pdf_data = await loop.run_in_executor(pool, extract_text_from_pdf, pdf_path)
+        async with semaphore:
+            return await extract_from_text(pdf_data['full_text'], background=True)
+
+    print(f"[Extracting {len(pdf_paths)} reports (concurrency={concurrency})...]")
+    results = await asyncio.gather(
+        *(_one(pdf_path) for pdf_path in pdf_paths),
+        return_exceptions=True
+    )
+
+    succeeded = sum(1 for r in results if not isinstance(r, Exception))
+    print(f"[OK] Extracted {succeeded}/{len(results)} reports")
+    return list(results)
+
+
+# Summary formatting constants, built once at import time
+_SEP = "=" * 60
+_ABNORMAL_FLAGS = frozenset(('HIGH', 'LOW', 'ABNORMAL'))
+
+
+def iter_extraction_summary(data: Dict[str, Any]) -> Iterator[str]:
+    """
+    Yield the lines of the human-readable extraction summary one at a time.
+
+    Lets CLI callers print the summary as it is produced instead of building
+    the whole string first; format_extraction_summary() joins the same lines.
+
+    Args:
+        data (Dict[str, Any]): Structured extraction result from extract_from_text()
+                              or extract_from_pdf()
+
+    Yields:
+        str: One summary line (without trailing newline)
+
+    Example:
+        >>> for line in iter_extraction_summary(data):
+        ...     print(line)
+    """
+    yield _SEP
+    yield "EXTRACTION SUMMARY"
+    yield _SEP
+
+    # Patient info
+    p = data.get('patient')
+    if p:
+        yield "\n👤 PATIENT"
+        yield f"   Name: {p.get('name', 'N/A')}"
+        yield f"   DOB: {p.get('dob', 'N/A')}"
+        yield f"   Gender: {p.get('gender', 'N/A')}"
+        yield f"   ID: {p.get('patient_id', 'N/A')}"
+
+    # Clinic info
+    c = data.get('clinic')
+    if c:
+        yield "\n CLINIC"
+        yield f"   {c.get('name', 'N/A')}"
+        yield f"   Doctor: {c.get('doctor', 'N/A')}"
+
+    # Test summary
+    all_tests = data.get('tests')
+    if all_tests:
+        yield f"\n TESTS ({len(all_tests)} total)"
+
+        # Group by category in one pass, counting abnormal results as we go
+        categories = defaultdict(list)
+        abnormal_count = 0
+        for test in all_tests:
+            categories[test.get('category', 'Other')].append(test)
+            if test.get('flag') in _ABNORMAL_FLAGS:
+                abnormal_count += 1
+        yield f"   Abnormal: {abnormal_count}"
+
+        for category, tests in categories.items():
+            yield f"\n   [{category}]"
+            for test in tests:
+                flag = test.get('flag', '')
+                flag_icon = "[!] " if flag in _ABNORMAL_FLAGS else "[OK] "
+                yield f"      {flag_icon}{test.get('name')}: {test.get('result')} {test.get('unit')} [{flag or 'NORMAL'}]"
+
+    # Summary
+    if data.get('summary'):
+        yield "\n[SUMMARY]"
+        yield f"   {data['summary']}"
+
+    yield "\n" + _SEP
 
 
 def format_extraction_summary(data: Dict[str, Any]) -> str:
@@ -265,55 +738,7 @@ def format_extraction_summary(data: Dict[str, Any]) -> str:
         ============================================================
         ...
     """
-    lines = []
-    lines.append("=" * 60)
-    lines.append("EXTRACTION SUMMARY")
-    lines.append("=" * 60)
-
-    # Patient info
-    if data.get('patient'):
-        lines.append("\n👤 PATIENT")
-        p = data['patient']
-        lines.append(f"   Name: {p.get('name', 'N/A')}")
-        lines.append(f"   DOB: {p.get('dob', 'N/A')}")
-        lines.append(f"   Gender: {p.get('gender', 'N/A')}")
-        lines.append(f"   ID: {p.get('patient_id', 'N/A')}")
-
-    # Clinic info
-    if data.get('clinic'):
-        lines.append("\n CLINIC")
-        c = data['clinic']
-        lines.append(f"   {c.get('name', 'N/A')}")
-        lines.append(f"   Doctor: {c.get('doctor', 'N/A')}")
-
-    # Test summary
-    if data.get('tests'):
-        lines.append(f"\n TESTS ({len(data['tests'])} total)")
-        abnormal_count = sum(1 for t in data['tests'] if t.get('flag') in ['HIGH', 'LOW', 'ABNORMAL'])
-        lines.append(f"   Abnormal: {abnormal_count}")
-
-        # Group by category
-        categories = {}
-        for test in data['tests']:
-            cat = test.get('category', 'Other')
-            if cat not in categories:
-                categories[cat] = []
-            categories[cat].append(test)
-
-        for category, tests in categories.items():
-            lines.append(f"\n   [{category}]")
-            for test in tests:
-                flag = test.get('flag', '')
-                flag_icon = "[!] " if flag in ['HIGH', 'LOW', 'ABNORMAL'] else "[OK] "
-                lines.append(f"      {flag_icon}{test.get('name')}: {test.get('result')} {test.get('unit')} [{flag or 'NORMAL'}]")
-
-    # Summary
-    if data.get('summary'):
-        lines.append("\n[SUMMARY]")
-        lines.append(f"   {data['summary']}")
-
-    lines.append("\n" + "=" * 60)
-    return "\n".join(lines)
+    return "\n".join(iter_extraction_summary(data))
 
 
 if __name__ == "__main__":
@@ -3,33 +3,26 @@ General QnA Agent
 Handles non-medical questions about health, wellness, nutrition, and general topics
 """
 import sys
+import re
+import math
 from pathlib import Path
+from typing import Dict, List, Tuple
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
 import config  # Load environment variables
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
+from google.adk.apps import App
 from google.adk.runners import InMemoryRunner
 from google.genai import types
 
+from agents._common import CONTEXT_CACHE_CONFIG, make_model, run_isolated, final_text
+from utils.cache import LRUCache
 
-# Configure retry options
-retry_config = types.HttpRetryOptions(
-    attempts=5,
-    exp_base=7,
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504]
-)
 
-
-# Create the General QnA Agent
-general_qa_agent = LlmAgent(
-    name="general_qa_agent",
-    model=Gemini(model="gemini-2.0-flash-lite", retry_options=retry_config),
-    description="Helpful assistant for general questions about health, wellness, and lifestyle",
-    instruction="""You are a helpful health assistant who answers questions about health, wellness, nutrition, fitness, and helps explain lab test results in an informative and educational way.
+# System instruction for the General QnA Agent
+GENERAL_QA_INSTRUCTION = """You are a helpful health assistant who answers questions about health, wellness, nutrition, fitness, and helps explain lab test results in an informative and educational way.
 
 YOUR SCOPE:
 [OK] Explain lab test results when provided with specific values and context
@@ -63,9 +56,93 @@ RESPONSE STYLE:
 ALWAYS INCLUDE:
 For health-related answers, add a brief disclaimer:
 "Note: This is general information only. Consult a healthcare professional for personalized medical advice."
-""",
+"""
+
+
+# Create the General QnA Agent
+general_qa_agent = LlmAgent(
+    name="general_qa_agent",
+    model=make_model("interactive"),
+    description="Helpful assistant for general questions about health, wellness, and lifestyle",
+    static_instruction=types.Content(parts=[types.Part(text=GENERAL_QA_INSTRUCTION)]),
 )
 
+# App wraps the agent with context caching of its static instruction
+general_qa_app = App(
+    name="general_qa_agent",
+    root_agent=general_qa_agent,
+    context_cache_config=CONTEXT_CACHE_CONFIG
+)
+
+# Runner is built once and shared by every call (each call runs in its own
+# throwaway session, see run_isolated)
+_runner = InMemoryRunner(app=general_qa_app)
+
+# Splits test names and questions into lowercase word tokens
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Words and word pairs that mark a question as being about the user's own lab
+# results, with how strongly each one points that way. A question's score is
+# MEDICAL_BIAS plus the weights of the terms it contains, squashed to a 0-1
+# confidence; any single term is enough to reach the 0.5 routing threshold.
+MEDICAL_TERM_WEIGHTS = {
+    # Direct references to the user's report
+    'lab result': 3.0, 'lab results': 3.0, 'test result': 3.0, 'test results': 3.0,
+    'blood test': 2.5, 'blood tests': 2.5, 'my report': 3.0,
+    'my result': 3.0, 'my results': 3.0, 'my value': 3.0, 'my values': 3.0,
+    # Common tests
+    'crp': 2.5, 'tsh': 2.5, 'cholesterol': 2.0, 'glucose': 2.0,
+    'hemoglobin': 2.0, 'vitamin d': 2.0,
+    # Result wording
+    'abnormal': 2.0, 'high': 1.5, 'higher': 1.5, 'low': 1.5, 'lower': 1.5,
+}
+MEDICAL_BIAS = -1.5
+
+
+def medical_confidence(question: str) -> float:
+    """
+    Score how likely a question is about the user's own lab results.
+
+    Pure Python (no model call): tokenizes the question once and looks up each
+    word and adjacent word pair in MEDICAL_TERM_WEIGHTS.
+
+    Args:
+        question: User's question
+
+    Returns:
+        float: Confidence between 0 and 1
+    """
+    tokens = _TOKEN_RE.findall(question.lower())
+    terms = set(tokens)
+    terms.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    score = MEDICAL_BIAS + sum(MEDICAL_TERM_WEIGHTS.get(term, 0.0) for term in terms)
+    return 1.0 / (1.0 + math.exp(-score))
+
+
+# Flags repeated next to a test result in the Q&A prompt
+_FLAGS_SHOWN = frozenset({'HIGH', 'LOW', 'ABNORMAL'})
+
+# Token -> positions of the tests whose name contains it, built once per
+# report. Keyed by id() of the report's test list; the list itself is kept in
+# the entry so the id cannot be reused while cached, and is compared on
+# lookup so a replaced list is re-indexed.
+_test_index_cache = LRUCache(maxsize=64)
+
+
+def _test_token_index(tests: List[dict]) -> Dict[str, List[int]]:
+    """Return the (cached) token index for a report's list of tests."""
+    entry: Tuple[List[dict], int, Dict[str, List[int]]] = _test_index_cache.get(id(tests))
+    if entry is not None and entry[0] is tests and entry[1] == len(tests):
+        return entry[2]
+
+    index: Dict[str, List[int]] = {}
+    for position, test in enumerate(tests):
+        for token in set(_TOKEN_RE.findall((test.get('name') or '').lower())):
+            index.setdefault(token, []).append(position)
+
+    _test_index_cache[id(tests)] = (tests, len(tests), index)
+    return index
+
 
 async def ask_general_question(question: str, lab_data: dict = None) -> str:
     """
@@ -80,22 +157,18 @@ async def ask_general_question(question: str, lab_data: dict = None) -> str:
     Returns:
         Answer to the question
     """
-    # Create runner for the agent
-    runner = InMemoryRunner(agent=general_qa_agent)
-
     # Build enhanced prompt if lab data is available
     prompt = question
 
-    if lab_data and lab_data.get('tests'):
-        # Check if question mentions any test from the lab data
-        question_lower = question.lower()
-        relevant_tests = []
-
-        for test in lab_data.get('tests', []):
-            test_name = test.get('name', '').lower()
-            # Check if test name (or common abbreviations) appear in question
-            if test_name in question_lower or any(word in question_lower for word in test_name.split()):
-                relevant_tests.append(test)
+    tests = lab_data.get('tests') if lab_data else None
+    if tests:
+        # Find tests whose name shares a word with the question: one index
+        # lookup per question word instead of scanning every test
+        index = _test_token_index(tests)
+        positions = set()
+        for token in set(_TOKEN_RE.findall(question.lower())):
+            positions.update(index.get(token, ()))
+        relevant_tests = [tests[position] for position in sorted(positions)]
 
         if relevant_tests:
             # Add lab context to the question
@@ -108,21 +181,16 @@ Relevant test results:
 """
             for test in relevant_tests:
                 flag = test.get('flag', 'NORMAL')
-                flag_text = f" [{flag}]" if flag in ['HIGH', 'LOW', 'ABNORMAL'] else ""
+                flag_text = f" [{flag}]" if flag in _FLAGS_SHOWN else ""
                 prompt += f"- {test.get('name')}: {test.get('result')} {test.get('unit')}{flag_text} (Reference: {test.get('reference_range')})\n"
 
             prompt += "\nPlease provide:\n1. Explanation of what this test result means for this patient\n2. General information about the test and what affects it\n3. Safe lifestyle/diet suggestions"
 
     print(f"[Processing question: {question[:60]}...]")
-    response = await runner.run_debug(prompt)
+    response = await run_isolated(_runner, prompt)
 
-    # Extract text from response
-    answer = ""
-    for event in response:
-        if event.content and event.content.parts:
-            for part in event.content.parts:
-                if hasattr(part, 'text') and part.text:
-                    answer = part.text
+    # Extract text from the final response
+    answer = final_text(response)
 
     if not answer:
         raise ValueError("No answer generated")
@@ -143,30 +211,24 @@ async def check_if_medical_question(question: str) -> dict:
             - is_medical: bool
             - reason: str (explanation)
             - suggested_agent: str (medical_interpreter or general_qa)
+            - confidence: float (0-1, how likely the question is medical)
     """
-    # Simple keyword-based check
-    medical_keywords = [
-        'lab result', 'test result', 'blood test', 'my report',
-        'crp', 'cholesterol', 'glucose', 'hemoglobin', 'tsh', 'vitamin d',
-        'high', 'low', 'abnormal', 'my results', 'my values'
-    ]
-
-    question_lower = question.lower()
-
-    # Check for medical keywords
-    is_medical = any(keyword in question_lower for keyword in medical_keywords)
+    # Local weighted keyword score - routing never costs a Gemini call
+    confidence = round(medical_confidence(question), 3)
 
-    if is_medical:
+    if confidence >= 0.5:
         return {
             "is_medical": True,
             "reason": "Question appears to be about specific lab results or medical values",
-            "suggested_agent": "medical_interpreter"
+            "suggested_agent": "medical_interpreter",
+            "confidence": confidence
         }
     else:
         return {
             "is_medical": False,
             "reason": "Question is general in nature",
-            "suggested_agent": "general_qa"
+            "suggested_agent": "general_qa",
+            "confidence": confidence
         }
 
 
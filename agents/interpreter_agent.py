@@ -24,32 +24,24 @@ Architecture:
 - Structured output with predefined sections
 - Context-aware interpretation based on patient data
 - Medical disclaimer compliance for legal safety
+- Bulk interpretation through Gemini Batch Mode for offline workloads
 """
 import sys
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Union
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
 import config  # Load API keys and environment variables
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
+from google.adk.apps import App
 from google.adk.runners import InMemoryRunner
 from google.genai import types
-import json
-
-
-# Configure retry options for API resilience
-# - Retries up to 5 times for transient failures
-# - Uses exponential backoff (base 7) starting at 1 second
-# - Handles rate limiting (429) and server errors (500, 503, 504)
-retry_config = types.HttpRetryOptions(
-    attempts=5,           # Maximum retry attempts
-    exp_base=7,          # Exponential backoff multiplier
-    initial_delay=1,     # Start with 1 second delay
-    http_status_codes=[429, 500, 503, 504]  # Retryable status codes
-)
+import orjson
+
+from agents._common import CONTEXT_CACHE_CONFIG, make_model, stream_isolated
+from utils.cache import LRUCache, content_hash
 
 
 # Medical disclaimer template - required for all interpretations
@@ -61,19 +53,13 @@ Always consult a licensed healthcare professional for diagnosis, treatment, and
 Do not make health decisions based solely on this information.
 """
 
+# Disclaimer block appended to every interpretation
+DISCLAIMER_BLOCK = "\n\n" + "="*60 + "\n" + MEDICAL_DISCLAIMER
 
-# Create the Interpreter Agent using Google's Gemini model
-# This agent specializes in translating medical jargon to patient-friendly language
-# Model choice: gemini-2.0-flash-lite for fast, empathetic responses
-# Part of multi-agent healthcare analysis system
-interpreter_agent = LlmAgent(
-    name="medical_interpreter",
-    model=Gemini(
-        model="gemini-2.0-flash-lite",  # Fast, lightweight Gemini model
-        retry_options=retry_config       # Configured retry behavior
-    ),
-    description="Explains medical lab results in plain English with actionable insights",
-    instruction="""You are a medical interpreter assistant who helps patients understand their lab results.
+
+# System instruction for the interpreter
+# Shared by the interactive agent and the Batch Mode path (interpret_many)
+INTERPRETER_INSTRUCTION = """You are a medical interpreter assistant who helps patients understand their lab results.
 
 YOUR RESPONSIBILITIES:
 1. Explain each abnormal test result in plain, simple English
@@ -117,10 +103,167 @@ Provide a structured response with these sections:
 [Professional summary suitable for sharing with healthcare provider]
 
 Remember: Be helpful, accurate, and always defer to medical professionals for diagnosis and treatment.
-""",
+"""
+
+
+# Create the Interpreter Agent using Google's Gemini model
+# This agent specializes in translating medical jargon to patient-friendly language
+# Model choice: gemini-2.0-flash-lite for fast, empathetic responses
+# Part of multi-agent healthcare analysis system
+interpreter_agent = LlmAgent(
+    name="medical_interpreter",
+    model=make_model("standard"),
+    description="Explains medical lab results in plain English with actionable insights",
+    static_instruction=types.Content(parts=[types.Part(text=INTERPRETER_INSTRUCTION)]),
+)
+
+# Same interpreter on the interactive retry profile, for chat follow-ups
+quick_question_agent = LlmAgent(
+    name="medical_interpreter_chat",
+    model=make_model("interactive"),
+    description="Answers follow-up questions about lab results",
+    static_instruction=types.Content(parts=[types.Part(text=INTERPRETER_INSTRUCTION)]),
+)
+
+# Apps wrap each agent with context caching of its static instruction
+interpreter_app = App(
+    name="medical_interpreter",
+    root_agent=interpreter_agent,
+    context_cache_config=CONTEXT_CACHE_CONFIG
+)
+quick_question_app = App(
+    name="medical_interpreter_chat",
+    root_agent=quick_question_agent,
+    context_cache_config=CONTEXT_CACHE_CONFIG
+)
+
+# Runners are built once and shared by every call (each call runs in its own
+# throwaway session, see run_isolated)
+_runner = InMemoryRunner(app=interpreter_app)
+_quick_question_runner = InMemoryRunner(app=quick_question_app)
+
+# Completed responses keyed by a hash of everything that goes into the prompt,
+# so re-opening the same report or re-asking a question costs no tokens.
+# Editing the report changes its hash, so stale entries are never served.
+_interpretation_cache = LRUCache(maxsize=512)
+_answer_cache = LRUCache(maxsize=512)
+
+
+# Whitespace in prompt JSON is billed as input tokens but adds nothing for the
+# model, so prompts use compact JSON. Indent only when debugging prompts.
+_PROMPT_JSON_OPTIONS = orjson.OPT_INDENT_2 if config.LOG_LEVEL.upper() == "DEBUG" else 0
+
+
+def _prompt_json(value: Any) -> str:
+    """Serialize lab data for inclusion in a prompt (compact, UTF-8)."""
+    return orjson.dumps(value, option=_PROMPT_JSON_OPTIONS).decode("utf-8")
+
+
+# Static segments of the per-call prompts, built once at import time and
+# joined with the dynamic values on each call
+_INTERPRET_PATIENT_HEADER = (
+    "Interpret these lab results and provide a clear, helpful explanation:\n\n"
+    "**Patient Information:**\n"
+)
+_INTERPRET_TESTS_HEADER = "\n\n**Test Results:**\n"
+_INTERPRET_COMMENTS_HEADER = "\n\n**Report Comments:**\n"
+_INTERPRET_SUMMARY_HEADER = "\n\n**Extracted Summary:**\n"
+_INTERPRET_CONTEXT_HEADER = "\n\n**Additional Context:**\n"
+_INTERPRET_FOOTER = (
+    "\n\nProvide a comprehensive interpretation following the structured "
+    "format in your instructions."
+)
+
+_QUESTION_HEADER = "User question: "
+_QUESTION_DATA_HEADER = "\n\n**Available Lab Data:**\n"
+_QUESTION_FOOTER = (
+    "\n\nProvide a brief, clear answer (2-3 paragraphs) to the user's question "
+    "based on their lab results.\nInclude the medical disclaimer at the end.\n"
 )
 
 
+def _build_interpretation_prompt(
+    structured_data: Dict[str, Any],
+    context: Optional[str] = None
+) -> str:
+    """Build the per-report user prompt sent alongside INTERPRETER_INSTRUCTION."""
+    # Include patient demographics for personalized interpretation
+    segments = [
+        _INTERPRET_PATIENT_HEADER,
+        _prompt_json(structured_data.get('patient', {})),
+        _INTERPRET_TESTS_HEADER,
+        _prompt_json(structured_data.get('tests', [])),
+        _INTERPRET_COMMENTS_HEADER,
+        str(structured_data.get('comments', 'None')),
+        _INTERPRET_SUMMARY_HEADER,
+        str(structured_data.get('summary', 'None')),
+    ]
+
+    # Add optional context if provided (e.g., medical history, medications)
+    if context:
+        segments.append(_INTERPRET_CONTEXT_HEADER)
+        segments.append(context)
+
+    segments.append(_INTERPRET_FOOTER)
+    return "".join(segments)
+
+
+async def interpret_lab_results_stream(
+    structured_data: Dict[str, Any],
+    context: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Stream the interpretation of structured lab results as it is generated.
+
+    Yields the model's text chunks as they arrive, followed by the medical
+    disclaimer, so a UI can start rendering at first-token latency instead of
+    waiting for the whole interpretation.
+
+    Args:
+        structured_data (Dict[str, Any]): JSON output from extractor_agent
+        context (Optional[str]): Additional patient context if available
+
+    Yields:
+        str: Interpretation text chunks, then the disclaimer block
+
+    Raises:
+        ValueError: If agent fails to generate an interpretation
+
+    Example:
+        >>> async for chunk in interpret_lab_results_stream(data):
+        ...     print(chunk, end="", flush=True)
+    """
+    # Serve repeat views of the same report from the cache
+    cache_key = content_hash(structured_data, context)
+    cached = _interpretation_cache.get(cache_key)
+    if cached is not None:
+        print("[OK] Interpretation served from cache")
+        yield cached
+        yield DISCLAIMER_BLOCK
+        return
+
+    # Build comprehensive prompt with all available lab data
+    prompt = _build_interpretation_prompt(structured_data, context)
+
+    # Run the agent asynchronously, forwarding text as it streams in
+    print("[Interpreting lab results...]")
+    chunks = []
+    async for chunk in stream_isolated(_runner, prompt):
+        chunks.append(chunk)
+        yield chunk
+
+    # Validate that we got a response
+    if not chunks:
+        raise ValueError("No interpretation generated")
+
+    print("[OK] Interpretation complete")
+
+    _interpretation_cache[cache_key] = "".join(chunks)
+
+    # Append mandatory medical disclaimer for legal compliance
+    yield DISCLAIMER_BLOCK
+
+
 async def interpret_lab_results(
     structured_data: Dict[str, Any],
     context: Optional[str] = None
@@ -160,55 +303,108 @@ async def interpret_lab_results(
         ## Test Results Overview
         ...
     """
-    # Create runner for the agent (manages agent execution lifecycle)
-    runner = InMemoryRunner(agent=interpreter_agent)
+    # Collect the streamed chunks for callers that want the full text
+    return "".join([
+        chunk async for chunk in interpret_lab_results_stream(structured_data, context)
+    ])
 
-    # Build comprehensive prompt with all available lab data
-    # Include patient demographics for personalized interpretation
-    prompt = f"""Interpret these lab results and provide a clear, helpful explanation:
 
-**Patient Information:**
-{json.dumps(structured_data.get('patient', {}), indent=2)}
+async def interpret_many(
+    structured_reports: List[Dict[str, Any]]
+) -> List[Union[str, Exception]]:
+    """
+    Interpret many structured lab reports in one Gemini Batch job.
 
-**Test Results:**
-{json.dumps(structured_data.get('tests', []), indent=2)}
+    Intended for non-interactive workloads such as re-interpreting stored
+    reports overnight. Batch jobs are billed at half the interactive rate
+    but only return once the whole job completes, so chat and upload flows
+    should keep using interpret_lab_results().
 
-**Report Comments:**
-{structured_data.get('comments', 'None')}
+    Args:
+        structured_reports (List[Dict[str, Any]]): Extractor outputs, one per report
 
-**Extracted Summary:**
-{structured_data.get('summary', 'None')}
-"""
+    Returns:
+        List[Union[str, Exception]]: One entry per input, in the same order.
+            Successful entries are interpretations (with the medical
+            disclaimer appended); failed entries are the exception describing
+            why that report could not be interpreted.
 
-    # Add optional context if provided (e.g., medical history, medications)
-    if context:
-        prompt += f"\n**Additional Context:**\n{context}\n"
+    Raises:
+        RuntimeError: If the batch job itself fails, is cancelled, or expires
+    """
+    # Lazy import: batch mode is only needed by bulk workflows
+    from agents.batch_runner import run_batch_job
 
-    prompt += "\nProvide a comprehensive interpretation following the structured format in your instructions."
+    prompts = [_build_interpretation_prompt(data) for data in structured_reports]
+    responses = await run_batch_job(
+        prompts,
+        system_instruction=INTERPRETER_INSTRUCTION,
+        display_name="health-report-interpretation",
+    )
 
-    # Run the agent asynchronously
-    print("[Interpreting lab results...]")
-    response = await runner.run_debug(prompt)
+    results: List[Union[str, Exception]] = [
+        response if isinstance(response, Exception)
+        else response + DISCLAIMER_BLOCK
+        for response in responses
+    ]
 
-    # Extract the interpretation text from agent's response
-    # Response is a stream of events; we need the final text content
-    interpretation = ""
-    for event in response:
-        if event.content and event.content.parts:
-            for part in event.content.parts:
-                if hasattr(part, 'text') and part.text:
-                    interpretation = part.text
+    succeeded = sum(1 for r in results if not isinstance(r, Exception))
+    print(f"[OK] Batch interpretation complete: {succeeded}/{len(results)} reports")
+    return results
 
-    # Validate that we got a response
-    if not interpretation:
-        raise ValueError("No interpretation generated")
 
-    print("[OK] Interpretation complete")
+async def quick_question_stream(question: str, lab_data: Dict[str, Any]) -> AsyncIterator[str]:
+    """
+    Stream the answer to a follow-up question about the lab results.
 
-    # Append mandatory medical disclaimer for legal compliance
-    full_response = interpretation + "\n\n" + "="*60 + "\n" + MEDICAL_DISCLAIMER
+    Args:
+        question (str): User's specific question about their lab results
+        lab_data (Dict[str, Any]): Structured lab data for context (from extractor)
+
+    Yields:
+        str: Answer text chunks as they are generated, then the disclaimer
+
+    Raises:
+        ValueError: If agent fails to generate an answer
+
+    Example:
+        >>> async for chunk in quick_question_stream("Why is my CRP high?", lab_data):
+        ...     print(chunk, end="", flush=True)
+    """
+    # Only the tests and the question go into the prompt, so they form the key
+    tests = lab_data.get('tests', [])
+    cache_key = content_hash(tests, question)
+    cached = _answer_cache.get(cache_key)
+    if cached is not None:
+        print("[OK] Answer served from cache")
+        yield cached
+        return
+
+    # Build targeted prompt with question and relevant lab data
+    prompt = "".join((
+        _QUESTION_HEADER, question,
+        _QUESTION_DATA_HEADER, _prompt_json(tests),
+        _QUESTION_FOOTER,
+    ))
+
+    # Run the agent asynchronously, forwarding text as it streams in
+    print(f"[Answering: {question}]")
+    chunks = []
+    async for chunk in stream_isolated(_quick_question_runner, prompt):
+        chunks.append(chunk)
+        yield chunk
+
+    # Validate that we got a response (never cache an empty answer)
+    if not chunks:
+        raise ValueError("No answer generated")
 
-    return full_response
+    print("[OK] Answer ready")
+
+    # Append medical disclaimer to answer
+    disclaimer = "\n\n" + MEDICAL_DISCLAIMER
+    chunks.append(disclaimer)
+    _answer_cache[cache_key] = "".join(chunks)
+    yield disclaimer
 
 
 async def quick_question(question: str, lab_data: Dict[str, Any]) -> str:
@@ -235,35 +431,8 @@ async def quick_question(question: str, lab_data: Dict[str, Any]) -> str:
         >>> print(answer)
         Your CRP level of 27.0 mg/L is elevated...
     """
-    # Create runner for the agent
-    runner = InMemoryRunner(agent=interpreter_agent)
-
-    # Build targeted prompt with question and relevant lab data
-    prompt = f"""User question: {question}
-
-**Available Lab Data:**
-{json.dumps(lab_data.get('tests', []), indent=2)}
-
-Provide a brief, clear answer (2-3 paragraphs) to the user's question based on their lab results.
-Include the medical disclaimer at the end.
-"""
-
-    # Run the agent asynchronously
-    print(f"[Answering: {question}]")
-    response = await runner.run_debug(prompt)
-
-    # Extract answer text from response
-    answer = ""
-    for event in response:
-        if event.content and event.content.parts:
-            for part in event.content.parts:
-                if hasattr(part, 'text') and part.text:
-                    answer = part.text
-
-    print("[OK] Answer ready")
-
-    # Append medical disclaimer to answer
-    return answer + "\n\n" + MEDICAL_DISCLAIMER
+    # Collect the streamed chunks for callers that want the full text
+    return "".join([chunk async for chunk in quick_question_stream(question, lab_data)])
 
 
 def format_for_print(interpretation: str) -> str:
@@ -3,19 +3,49 @@ Orchestrator Agent
 Routes user requests to appropriate agents and manages conversation flow
 """
 import sys
+import asyncio
+import itertools
+from collections import defaultdict, deque
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
 import config  # Load environment variables
-from agents.extractor_agent import extract_from_pdf, extract_from_text
+from agents.extractor_agent import extract_from_text
 from agents.interpreter_agent import interpret_lab_results, quick_question
 from agents.general_qa_agent import ask_general_question, check_if_medical_question
-from typing import Optional, Dict, Any
+from agents.pipeline import extract_and_interpret_pdf
+from utils.cache import LRUCache, content_hash
+from typing import Optional, Dict, Any, List
 import json
 
 
+# Most recent history entries kept per user
+MAX_HISTORY_PER_USER = 1000
+
+# Lab reports kept in memory; least recently used users are evicted beyond this
+MAX_LAB_REPORTS = 1024
+
+# Flags that count a test as abnormal in summaries
+_ABNORMAL_FLAGS = frozenset({'HIGH', 'LOW', 'ABNORMAL'})
+
+# Separator line printed around each request
+_BANNER = "=" * 60
+
+# Summary shown after a report is processed (filled in with format_map)
+_PDF_SUMMARY_TMPL = """
+[Report processed for: {name}]
+   Tests: {n} total, {abn} abnormal
+   Status: Ready for questions
+
+[You can now ask:]
+   - "Why is my [test name] high/low?"
+   - "What should I do about [test name]?"
+   - "Explain my results in simple terms"
+"""
+
+
 class HealthReportOrchestrator:
     """
     Central orchestrator that coordinates all agents and manages conversation state.
@@ -23,8 +53,18 @@ class HealthReportOrchestrator:
 
     def __init__(self):
         """Initialize orchestrator with empty state"""
-        self.lab_reports = {}  # Store extracted lab reports by user/session
-        self.conversation_history = []  # Track conversation flow
+        self.lab_reports = LRUCache(maxsize=MAX_LAB_REPORTS)  # Store extracted lab reports by user/session
+        # Track conversation flow per user (bounded, O(1) to clear one user)
+        self.conversation_history = defaultdict(lambda: deque(maxlen=MAX_HISTORY_PER_USER))
+        self._interpretation_cache = LRUCache(maxsize=128)  # Lab-data hash -> interpretation
+        # user_id -> get_lab_summary() result; same bound as lab_reports
+        self._summary_cache = LRUCache(maxsize=MAX_LAB_REPORTS)
+        self._classification_cache = LRUCache(maxsize=512)  # Normalized question -> classification
+
+    @staticmethod
+    def _lab_hash(lab_data: Dict[str, Any]) -> str:
+        """Stable hash of a lab report's content (key for cached interpretations)."""
+        return content_hash(lab_data)
 
     async def process_pdf(self, pdf_path: str, user_id: str = "default") -> Dict[str, Any]:
         """
@@ -41,40 +81,37 @@ class HealthReportOrchestrator:
                 - summary: Human-readable summary
                 - interpretation: Medical interpretation
         """
-        print(f"\n{'='*60}")
+        print("\n" + _BANNER)
         print("PROCESSING LAB REPORT PDF")
-        print(f"{'='*60}\n")
+        print(_BANNER + "\n")
 
         try:
-            # Step 1: Extract structured data
+            # Steps 1-2: Extract structured data (long reports in concurrent
+            # page batches, merged) and interpret the complete report
             print("Step 1/3: Extracting data from PDF...")
-            lab_data = await extract_from_pdf(pdf_path)
+            print("Step 2/3: Generating medical interpretation...")
+            pipeline_result = await extract_and_interpret_pdf(pdf_path)
+            lab_data = pipeline_result["lab_data"]
+            interpretation = pipeline_result["interpretation"]
 
-            # Store in memory
+            # Store in memory (and keep the interpretation for get_full_interpretation)
             self.lab_reports[user_id] = lab_data
-            print("[OK] Lab data extracted and stored\n")
-
-            # Step 2: Generate interpretation
-            print("Step 2/3: Generating medical interpretation...")
-            interpretation = await interpret_lab_results(lab_data)
+            self._summary_cache.pop(user_id, None)
+            self._interpretation_cache[self._lab_hash(lab_data)] = interpretation
+            print("[OK] Lab data extracted and stored")
             print("[OK] Interpretation complete\n")
 
             # Step 3: Create summary
             patient = lab_data.get('patient', {})
-            num_tests = len(lab_data.get('tests', []))
-            abnormal = len([t for t in lab_data.get('tests', [])
-                          if t.get('flag') in ['HIGH', 'LOW', 'ABNORMAL']])
-
-            summary = f"""
-[Report processed for: {patient.get('name', 'Unknown')}]
-   Tests: {num_tests} total, {abnormal} abnormal
-   Status: Ready for questions
-
-[You can now ask:]
-   - "Why is my [test name] high/low?"
-   - "What should I do about [test name]?"
-   - "Explain my results in simple terms"
-"""
+            tests = lab_data.get('tests', ())
+            num_tests = len(tests)
+            abnormal = sum(1 for t in tests if t.get('flag') in _ABNORMAL_FLAGS)
+
+            summary = _PDF_SUMMARY_TMPL.format_map({
+                'name': patient.get('name', 'Unknown'),
+                'n': num_tests,
+                'abn': abnormal
+            })
 
             result = {
                 "status": "success",
@@ -85,7 +122,7 @@ class HealthReportOrchestrator:
             }
 
             # Track in history
-            self.conversation_history.append({
+            self.conversation_history[user_id].append({
                 "type": "pdf_upload",
                 "user_id": user_id,
                 "patient": patient.get('name'),
@@ -101,6 +138,55 @@ class HealthReportOrchestrator:
                 "message": f"[ERROR] Failed to process PDF: {str(e)}"
             }
 
+    async def process_pdf_batch(
+        self,
+        pdf_paths: List[str],
+        user_id: str = "default",
+        max_concurrency: int = 4
+    ) -> Dict[str, Any]:
+        """
+        Process several PDF lab reports concurrently.
+
+        Each report is stored under its own key, "<user_id>:<pdf_path>", so
+        the reports do not overwrite each other in lab_reports.
+
+        Args:
+            pdf_paths: Paths to PDF files
+            user_id: User identifier the report keys are derived from
+            max_concurrency: Maximum number of reports processed at once
+
+        Returns:
+            Dict with:
+                - status: "success" if every report was processed, else "partial"
+                  (or "error" if none was)
+                - successful: process_pdf() results, each with its pdf_path and user_id
+                - failed: Dicts with pdf_path, user_id and error
+        """
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def _one(pdf_path: str) -> Dict[str, Any]:
+            async with sem:
+                return await self.process_pdf(pdf_path, user_id=f"{user_id}:{pdf_path}")
+
+        results = await asyncio.gather(*[_one(p) for p in pdf_paths], return_exceptions=True)
+
+        successful, failed = [], []
+        for pdf_path, result in zip(pdf_paths, results):
+            report_user_id = f"{user_id}:{pdf_path}"
+            if isinstance(result, BaseException):
+                failed.append({"pdf_path": pdf_path, "user_id": report_user_id, "error": str(result)})
+            elif result["status"] != "success":
+                failed.append({"pdf_path": pdf_path, "user_id": report_user_id, "error": result["error"]})
+            else:
+                successful.append({**result, "pdf_path": pdf_path, "user_id": report_user_id})
+
+        return {
+            "status": "success" if not failed else ("partial" if successful else "error"),
+            "successful": successful,
+            "failed": failed,
+            "message": f"[OK] Processed {len(successful)} of {len(pdf_paths)} reports."
+        }
+
     async def process_question(self, question: str, user_id: str = "default") -> Dict[str, Any]:
         """
         Process a user question and route to appropriate agent.
@@ -116,9 +202,9 @@ class HealthReportOrchestrator:
                 - agent_used: Which agent provided the answer
                 - context_used: Whether lab data was used
         """
-        print(f"\n{'='*60}")
+        print("\n" + _BANNER)
         print("PROCESSING QUESTION")
-        print(f"{'='*60}")
+        print(_BANNER)
         print(f"[Question: {question}]\n")
 
         try:
@@ -132,27 +218,22 @@ class HealthReportOrchestrator:
             else:
                 print("No lab context available")
 
-            # Classify question
-            classification = await check_if_medical_question(question)
+            # Both routes use General QnA with the same arguments (it uses lab
+            # data when relevant), so classification only labels the answer.
+            # It is a local keyword score that never suspends, so it is awaited
+            # inline rather than scheduled as a task next to the answer.
+            print("→ Routing to: General QnA\n")
+            # The same questions recur across users; reuse their classification
+            classification_key = " ".join(question.lower().split())[:200]
+            classification = self._classification_cache.get(classification_key)
+            if classification is None:
+                classification = await check_if_medical_question(question)
+                self._classification_cache[classification_key] = classification
+            answer = await ask_general_question(question, lab_data=lab_data)
             is_medical = classification["is_medical"]
 
             print(f" Classification: {'Medical' if is_medical else 'General'}")
-
-            # Route to appropriate agent
-            if is_medical:
-                print(f"→ Routing to: General QnA (with {'context' if has_context else 'no context'})\n")
-
-                # For medical questions, use general QnA with context
-                # (It will use lab data if available)
-                answer = await ask_general_question(question, lab_data=lab_data)
-                agent_used = "general_qa_with_context"
-
-            else:
-                print(f"→ Routing to: General QnA\n")
-
-                # General questions
-                answer = await ask_general_question(question, lab_data=lab_data)
-                agent_used = "general_qa"
+            agent_used = "general_qa_with_context" if is_medical else "general_qa"
 
             result = {
                 "status": "success",
@@ -163,7 +244,7 @@ class HealthReportOrchestrator:
             }
 
             # Track in history
-            self.conversation_history.append({
+            self.conversation_history[user_id].append({
                 "type": "question",
                 "user_id": user_id,
                 "question": question[:50],
@@ -199,8 +280,13 @@ class HealthReportOrchestrator:
             }
 
         try:
-            print("\n[Generating full interpretation...]")
-            interpretation = await interpret_lab_results(lab_data)
+            # Reuse the interpretation from process_pdf if the data is unchanged
+            lab_hash = self._lab_hash(lab_data)
+            interpretation = self._interpretation_cache.get(lab_hash)
+            if interpretation is None:
+                print("\n[Generating full interpretation...]")
+                interpretation = await interpret_lab_results(lab_data)
+                self._interpretation_cache[lab_hash] = interpretation
 
             return {
                 "status": "success",
@@ -226,6 +312,11 @@ class HealthReportOrchestrator:
         """
         lab_data = self.lab_reports.get(user_id)
 
+        # Stored reports only change on upload/clear, which evict this entry
+        cached = self._summary_cache.get(user_id)
+        if cached is not None and lab_data is not None:
+            return cached
+
         if not lab_data:
             return {
                 "status": "error",
@@ -234,9 +325,9 @@ class HealthReportOrchestrator:
 
         patient = lab_data.get('patient', {})
         tests = lab_data.get('tests', [])
-        abnormal = [t for t in tests if t.get('flag') in ['HIGH', 'LOW', 'ABNORMAL']]
+        abnormal = [t for t in tests if t.get('flag') in _ABNORMAL_FLAGS]
 
-        return {
+        summary = {
             "status": "success",
             "patient": patient.get('name'),
             "total_tests": len(tests),
@@ -251,21 +342,33 @@ class HealthReportOrchestrator:
                 for t in abnormal
             ]
         }
+        self._summary_cache[user_id] = summary
+        return summary
 
     def clear_data(self, user_id: str = "default"):
         """Clear stored data for a user"""
         if user_id in self.lab_reports:
             del self.lab_reports[user_id]
-        self.conversation_history = [h for h in self.conversation_history
-                                    if h.get('user_id') != user_id]
+        self._summary_cache.pop(user_id, None)
+        self.conversation_history.pop(user_id, None)
 
     def get_conversation_history(self) -> list:
-        """Get conversation history"""
-        return self.conversation_history
+        """Get conversation history (grouped by user, oldest first within each user)"""
+        return list(itertools.chain.from_iterable(self.conversation_history.values()))
+
+
+# Global orchestrator instance, created on first access (PEP 562) so that
+# importing this module does not construct it
+_instances: Dict[str, HealthReportOrchestrator] = {}
 
 
-# Global orchestrator instance
-orchestrator = HealthReportOrchestrator()
+def __getattr__(name: str) -> HealthReportOrchestrator:
+    if name == "orchestrator":
+        instance = _instances.get(name)
+        if instance is None:
+            instance = _instances[name] = HealthReportOrchestrator()
+        return instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
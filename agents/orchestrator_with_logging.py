@@ -24,9 +24,11 @@ Production Features:
 - Metrics collection for SLA monitoring
 """
 import sys
+import asyncio
+import logging
 from pathlib import Path
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, AsyncIterator
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
@@ -35,10 +37,32 @@ import config
 from google.adk.sessions import InMemorySessionService
 from google.adk.memory import InMemoryMemoryService
 from google.adk.plugins import LoggingPlugin
-from agents.extractor_agent import extract_from_pdf
-from agents.interpreter_agent import interpret_lab_results
 from agents.general_qa_agent import ask_general_question
+from agents.interpreter_agent import interpret_lab_results_stream
+from agents.pipeline import extract_and_interpret_pdf, extract_lab_data
 from utils.logging_config import setup_logging, get_logger, metrics_tracker
+from utils.cache import LRUCache, content_hash
+
+
+# Lab reports kept in memory; least recently used users are evicted beyond this
+MAX_LAB_REPORTS = 1024
+
+# Flags that count a test as abnormal in the processing summary
+_ABNORMAL_FLAGS = frozenset({'HIGH', 'LOW'})
+
+# Separator line for the log banners around each request
+_BANNER = "=" * 60
+
+# Summary returned after a report is processed (filled in with format_map)
+_PDF_SUMMARY_TMPL = """
+[REPORT PROCESSED]
+   Patient: {name}
+   Tests: {n} total, {abn} abnormal
+   Session: {session_id}
+   Processing time: {total_time:.2f}s
+
+[INFO] Your conversation history is now tracked!
+"""
 
 
 class HealthReportOrchestratorWithLogging:
@@ -88,9 +112,9 @@ class HealthReportOrchestratorWithLogging:
         """
         # Setup logging
         self.logger = setup_logging(level=log_level)
-        self.logger.info("="*60)
+        self.logger.info(_BANNER)
         self.logger.info("Initializing Health Report Orchestrator with Logging")
-        self.logger.info("="*60)
+        self.logger.info(_BANNER)
 
         # Initialize session management service
         # InMemorySessionService: Lightweight in-memory session tracking
@@ -107,16 +131,31 @@ class HealthReportOrchestratorWithLogging:
 
         # Local state: In-memory cache of processed lab reports
         # Key: user_id, Value: structured lab data
-        # Note: This cache is session-scoped, not persistent
-        self.lab_reports = {}
+        # Note: This cache is session-scoped, not persistent. It is bounded:
+        # beyond MAX_LAB_REPORTS users the least recently used is evicted
+        self.lab_reports = LRUCache(maxsize=MAX_LAB_REPORTS)
+
+        # Answer cache for repeated questions against the same report
+        # Key: (lab data hash, normalized question), Value: answer text
+        # Bounded LRU so long-running servers don't grow without limit
+        self._answer_cache = LRUCache(maxsize=256)
+
+        # Default session ID per user, so repeat requests skip the formatting
+        # Key: user_id, Value: "session_<user_id>"
+        self._session_id_by_user: Dict[str, str] = {}
 
         # Metrics tracker for performance monitoring
         # Tracks: extraction time, interpretation time, errors, etc.
         self.metrics = metrics_tracker
 
         self.logger.info("Orchestrator initialized successfully")
-        self.logger.debug(f"Session service: {type(self.session_service).__name__}")
-        self.logger.debug(f"Memory service: {type(self.memory_service).__name__}")
+        self.logger.debug("Session service: %s", type(self.session_service).__name__)
+        self.logger.debug("Memory service: %s", type(self.memory_service).__name__)
+
+    @staticmethod
+    def _answer_key(lab_data: Optional[Dict[str, Any]], question: str) -> tuple:
+        """Key of _answer_cache: (lab data hash, normalized question)."""
+        return (content_hash(lab_data), " ".join(question.lower().split()))
 
     async def create_or_get_session(
         self,
@@ -143,24 +182,28 @@ class HealthReportOrchestratorWithLogging:
             'session_user123'
         """
         if session_id is None:
-            session_id = f"session_{user_id}"
-
-        self.logger.debug(f"Creating/retrieving session for user={user_id}, session={session_id}")
-
-        try:
+            session_id = self._session_id_by_user.get(user_id)
+            if session_id is None:
+                session_id = self._session_id_by_user[user_id] = f"session_{user_id}"
+
+        self.logger.debug("Creating/retrieving session for user=%s, session=%s", user_id, session_id)
+
+        # Look up first: every request after a user's first one finds the
+        # session, so creation (and its duplicate-ID error) is the rare path
+        session = await self.session_service.get_session(
+            app_name=self.app_name,
+            user_id=user_id,
+            session_id=session_id
+        )
+        if session is None:
             session = await self.session_service.create_session(
                 app_name=self.app_name,
                 user_id=user_id,
                 session_id=session_id
             )
-            self.logger.info(f"Created new session: {session.id}")
-        except:
-            session = await self.session_service.get_session(
-                app_name=self.app_name,
-                user_id=user_id,
-                session_id=session_id
-            )
-            self.logger.info(f"Retrieved existing session: {session.id}")
+            self.logger.info("Created new session: %s", session.id)
+        else:
+            self.logger.debug("Retrieved existing session: %s", session.id)
 
         return session
 
@@ -205,71 +248,76 @@ class HealthReportOrchestratorWithLogging:
             ...     print(f"Found {len(result['data']['tests'])} tests")
             ...     print(result['interpretation'])
         """
-        start_time = time.time()
-        self.logger.info("="*60)
-        self.logger.info(f"PROCESSING PDF - User: {user_id}")
-        self.logger.info("="*60)
-        self.logger.debug(f"PDF path: {pdf_path}")
+        start_time = time.perf_counter()
+        # Metrics are collected here and flushed to the tracker in one call
+        pending_metrics = []
+        self.logger.info(_BANNER)
+        self.logger.info("PROCESSING PDF - User: %s", user_id)
+        self.logger.info(_BANNER)
+        self.logger.debug("PDF path: %s", pdf_path)
 
         try:
             # Create/get session
             session = await self.create_or_get_session(user_id, session_id)
 
-            # Step 1: Extract data
+            # Steps 1-2: Extract data (long reports in concurrent page
+            # batches, merged) and interpret the complete report
             self.logger.info("Step 1/3: Extracting from PDF...")
-            extract_start = time.time()
-
-            lab_data = await extract_from_pdf(pdf_path)
+            self.logger.info("Step 2/3: Generating interpretation...")
 
-            extract_time = time.time() - extract_start
-            self.metrics.record("pdf_extraction_time", extract_time, {"user_id": user_id})
+            # Saving the session to memory does not depend on the report, so it
+            # runs alongside the pipeline; the TaskGroup cancels the other one
+            # if either fails
+            try:
+                async with asyncio.TaskGroup() as tg:
+                    pipeline_task = tg.create_task(extract_and_interpret_pdf(pdf_path))
+                    tg.create_task(self.memory_service.add_session_to_memory(session))
+            except ExceptionGroup as eg:
+                raise eg.exceptions[0]
+            pipeline_result = pipeline_task.result()
+            lab_data = pipeline_result["lab_data"]
+            interpretation = pipeline_result["interpretation"]
+
+            extract_time = pipeline_result["extraction_time"]
+            pending_metrics.append(("pdf_extraction_time", extract_time, {"user_id": user_id}))
 
             self.lab_reports[user_id] = lab_data
-            num_tests = len(lab_data.get('tests', []))
-            self.logger.info(f"Extracted {num_tests} tests in {extract_time:.2f}s")
-            self.logger.debug(f"Patient: {lab_data.get('patient', {}).get('name')}")
-
-            # Step 2: Generate interpretation
-            self.logger.info("Step 2/3: Generating interpretation...")
-            interpret_start = time.time()
-
-            interpretation = await interpret_lab_results(lab_data)
+            tests = lab_data.get('tests', ())
+            num_tests = len(tests)
+            self.logger.info("Extracted %d tests in %.2fs", num_tests, extract_time)
+            self.logger.debug("Patient: %s", lab_data.get('patient', {}).get('name'))
 
-            interpret_time = time.time() - interpret_start
-            self.metrics.record("interpretation_time", interpret_time, {"user_id": user_id})
-            self.logger.info(f"Interpretation complete in {interpret_time:.2f}s")
+            interpret_time = pipeline_result["interpretation_time"]
+            pending_metrics.append(("interpretation_time", interpret_time, {"user_id": user_id}))
+            self.logger.info("Interpretation complete in %.2fs", interpret_time)
 
-            # Step 3: Save to memory
-            self.logger.info("Step 3/3: Saving to memory...")
-            session = await self.session_service.get_session(
-                app_name=self.app_name,
-                user_id=user_id,
-                session_id=session.id
-            )
-            await self.memory_service.add_session_to_memory(session)
+            # Step 3: Save to memory (done alongside steps 1-2 above)
+            self.logger.info("Step 3/3: Saved to memory")
             self.logger.debug("Session saved to memory service")
 
             # Summary
             patient = lab_data.get('patient', {})
-            abnormal_tests = [t for t in lab_data.get('tests', []) if t.get('flag') in ['HIGH', 'LOW']]
-
-            total_time = time.time() - start_time
-            self.metrics.record("pdf_processing_total_time", total_time, {"user_id": user_id})
+            abnormal_count = sum(1 for t in tests if t.get('flag') in _ABNORMAL_FLAGS)
 
-            self.logger.info("="*60)
-            self.logger.info(f"PDF Processing Complete - Total time: {total_time:.2f}s")
-            self.logger.info(f"Patient: {patient.get('name')}, Tests: {num_tests}, Abnormal: {len(abnormal_tests)}")
-            self.logger.info("="*60)
+            total_time = time.perf_counter() - start_time
+            pending_metrics.append(("pdf_processing_total_time", total_time, {"user_id": user_id}))
+            self.metrics.record_many(pending_metrics)
 
-            summary = f"""
-[REPORT PROCESSED]
-   Patient: {patient.get('name', 'Unknown')}
-   Tests: {num_tests} total, {len(abnormal_tests)} abnormal
-   Session: {session.id}
-   Processing time: {total_time:.2f}s
+            self.logger.info(_BANNER)
+            self.logger.info("PDF Processing Complete - Total time: %.2fs", total_time)
+            self.logger.info(
+                "Patient: %s, Tests: %d, Abnormal: %d",
+                patient.get('name'), num_tests, abnormal_count
+            )
+            self.logger.info(_BANNER)
 
-[INFO] Your conversation history is now tracked!
-"""
+            summary = _PDF_SUMMARY_TMPL.format_map({
+                'name': patient.get('name', 'Unknown'),
+                'n': num_tests,
+                'abn': abnormal_count,
+                'session_id': session.id,
+                'total_time': total_time
+            })
 
             return {
                 "status": "success",
@@ -285,14 +333,156 @@ class HealthReportOrchestratorWithLogging:
             }
 
         except Exception as e:
-            self.logger.error(f"PDF processing failed: {str(e)}", exc_info=True)
-            self.metrics.record("pdf_processing_errors", 1, {"user_id": user_id})
+            self.logger.error("PDF processing failed: %s", e, exc_info=True)
+            pending_metrics.append(("pdf_processing_errors", 1, {"user_id": user_id}))
+            self.metrics.record_many(pending_metrics)
             return {
                 "status": "error",
                 "error": str(e),
                 "message": f"[ERROR] Failed: {str(e)}"
             }
 
+    async def process_pdf_streaming(
+        self,
+        pdf_path: str,
+        user_id: str = "default",
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Process a PDF lab report, streaming the interpretation as it is generated.
+
+        Same workflow and metrics as process_pdf_with_logging(), but the
+        interpretation is yielded chunk by chunk so a UI can render it at
+        first-token latency. The extracted data is stored in lab_reports
+        under user_id before the first chunk is yielded.
+
+        Args:
+            pdf_path (str): Path to the PDF lab report file
+            user_id (str): Unique user identifier. Defaults to "default"
+            session_id (Optional[str]): Specific session ID. If None, auto-generated.
+
+        Yields:
+            str: Interpretation text chunks, ending with the medical disclaimer
+
+        Raises:
+            Exception: Any extraction or interpretation failure (logged and
+                counted in pdf_processing_errors before being re-raised)
+
+        Example:
+            >>> async for chunk in orchestrator.process_pdf_streaming("report.pdf"):
+            ...     print(chunk, end="", flush=True)
+            >>> lab_data = orchestrator.lab_reports["default"]
+        """
+        start_time = time.perf_counter()
+        pending_metrics = []
+        self.logger.info(_BANNER)
+        self.logger.info("PROCESSING PDF (STREAMING) - User: %s", user_id)
+        self.logger.info(_BANNER)
+        self.logger.debug("PDF path: %s", pdf_path)
+
+        try:
+            session = await self.create_or_get_session(user_id, session_id)
+
+            # Step 1: Extract (the interpretation needs the complete data);
+            # same extract/merge path as process_pdf_with_logging
+            self.logger.info("Step 1/3: Extracting from PDF...")
+            lab_data = await extract_lab_data(pdf_path)
+            extract_time = time.perf_counter() - start_time
+            pending_metrics.append(("pdf_extraction_time", extract_time, {"user_id": user_id}))
+            self.lab_reports[user_id] = lab_data
+            self.logger.info("Extracted %d tests in %.2fs", len(lab_data.get('tests', ())), extract_time)
+
+            # Step 2: Stream the interpretation
+            self.logger.info("Step 2/3: Streaming interpretation...")
+            interpret_start = time.perf_counter()
+            async for chunk in interpret_lab_results_stream(lab_data):
+                yield chunk
+            interpret_time = time.perf_counter() - interpret_start
+            pending_metrics.append(("interpretation_time", interpret_time, {"user_id": user_id}))
+            self.logger.info("Interpretation complete in %.2fs", interpret_time)
+
+            # Step 3: Save to memory
+            self.logger.info("Step 3/3: Saving to memory...")
+            await self.memory_service.add_session_to_memory(session)
+
+            total_time = time.perf_counter() - start_time
+            pending_metrics.append(("pdf_processing_total_time", total_time, {"user_id": user_id}))
+            self.metrics.record_many(pending_metrics)
+            self.logger.info("PDF Processing Complete - Total time: %.2fs", total_time)
+
+        except Exception as e:
+            self.logger.error("PDF processing failed: %s", e, exc_info=True)
+            pending_metrics.append(("pdf_processing_errors", 1, {"user_id": user_id}))
+            self.metrics.record_many(pending_metrics)
+            raise
+
+    async def process_pdf_batch(
+        self,
+        pdf_paths: List[str],
+        user_id: str = "default",
+        max_concurrency: int = 4
+    ) -> Dict[str, Any]:
+        """
+        Process several PDF lab reports concurrently with logging and metrics.
+
+        Each report runs through process_pdf_with_logging() under its own user
+        key, "<user_id>:<pdf_path>", so reports and sessions stay separate.
+
+        Args:
+            pdf_paths (List[str]): Paths to the PDF lab report files
+            user_id (str): User identifier the report keys are derived from
+            max_concurrency (int): Maximum number of reports processed at once.
+                                   Defaults to 4.
+
+        Returns:
+            Dict[str, Any]: Batch result containing:
+                - status (str): "success", "partial" or "error"
+                - successful (List[Dict]): process_pdf_with_logging() results,
+                  each with its pdf_path and user_id
+                - failed (List[Dict]): pdf_path, user_id and error per failure
+                - metrics (Dict): total_time for the whole batch
+
+        Example:
+            >>> batch = await orchestrator.process_pdf_batch(["a.pdf", "b.pdf"])
+            >>> print(len(batch['successful']), len(batch['failed']))
+        """
+        start_time = time.perf_counter()
+        self.logger.info(
+            "Processing batch of %d PDFs (max %d at once) - User: %s",
+            len(pdf_paths), max_concurrency, user_id
+        )
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def _one(pdf_path: str) -> Dict[str, Any]:
+            async with sem:
+                return await self.process_pdf_with_logging(pdf_path, user_id=f"{user_id}:{pdf_path}")
+
+        results = await asyncio.gather(*[_one(p) for p in pdf_paths], return_exceptions=True)
+
+        successful, failed = [], []
+        for pdf_path, result in zip(pdf_paths, results):
+            report_user_id = f"{user_id}:{pdf_path}"
+            if isinstance(result, BaseException):
+                failed.append({"pdf_path": pdf_path, "user_id": report_user_id, "error": str(result)})
+            elif result["status"] != "success":
+                failed.append({"pdf_path": pdf_path, "user_id": report_user_id, "error": result["error"]})
+            else:
+                successful.append({**result, "pdf_path": pdf_path, "user_id": report_user_id})
+
+        total_time = time.perf_counter() - start_time
+        self.metrics.record("pdf_batch_total_time", total_time, {"user_id": user_id})
+        self.logger.info(
+            "Batch complete in %.2fs: %d succeeded, %d failed",
+            total_time, len(successful), len(failed)
+        )
+
+        return {
+            "status": "success" if not failed else ("partial" if successful else "error"),
+            "successful": successful,
+            "failed": failed,
+            "metrics": {"total_time": total_time}
+        }
+
     async def process_question_with_logging(
         self,
         question: str,
@@ -302,11 +492,11 @@ class HealthReportOrchestratorWithLogging:
         """
         Process question with detailed logging and metrics.
         """
-        start_time = time.time()
-        self.logger.info("="*60)
-        self.logger.info(f"PROCESSING QUESTION - User: {user_id}")
-        self.logger.info("="*60)
-        self.logger.debug(f"Question: {question}")
+        start_time = time.perf_counter()
+        self.logger.info(_BANNER)
+        self.logger.info("PROCESSING QUESTION - User: %s", user_id)
+        self.logger.info(_BANNER)
+        self.logger.debug("Question: %s", question)
 
         try:
             # Get session
@@ -318,41 +508,52 @@ class HealthReportOrchestratorWithLogging:
 
             if has_lab_context:
                 patient = lab_data.get('patient', {})
-                self.logger.info(f"Lab context available: {patient.get('name')}'s report")
-                self.logger.debug(f"Tests in context: {len(lab_data.get('tests', []))}")
+                self.logger.info("Lab context available: %s's report", patient.get('name'))
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug("Tests in context: %d", len(lab_data.get('tests', ())))
             else:
                 self.logger.warning("No lab context available for this user")
 
-            # Search memory
+            # Search memory and generate the answer concurrently
+            # (the answer does not depend on the memory search)
             self.logger.debug("Searching memory for relevant context...")
-            memory_results = await self.memory_service.search_memory(
-                app_name=self.app_name,
-                user_id=user_id,
-                query=question
-            )
-            self.logger.info(f"Found {len(memory_results.memories)} relevant memories")
-
-            # Generate answer
-            self.logger.info("Generating answer...")
-            answer_start = time.time()
-
-            answer = await ask_general_question(question, lab_data=lab_data)
-
-            answer_time = time.time() - answer_start
+            answer_start = time.perf_counter()
+
+            # Same question about the same report: reuse the earlier answer
+            answer_key = self._answer_key(lab_data, question)
+            cached_answer = self._answer_cache.get(answer_key)
+
+            if cached_answer is not None:
+                self.logger.info("Answer served from cache")
+                memory_results = await self.memory_service.search_memory(
+                    app_name=self.app_name,
+                    user_id=user_id,
+                    query=question
+                )
+                answer = cached_answer
+            else:
+                self.logger.info("Generating answer...")
+                memory_results, answer = await asyncio.gather(
+                    self.memory_service.search_memory(
+                        app_name=self.app_name,
+                        user_id=user_id,
+                        query=question
+                    ),
+                    ask_general_question(question, lab_data=lab_data)
+                )
+                self._answer_cache[answer_key] = answer
+
+            answer_time = time.perf_counter() - answer_start
             self.metrics.record("question_answer_time", answer_time, {"user_id": user_id})
-            self.logger.info(f"Answer generated in {answer_time:.2f}s")
+            self.logger.info("Found %d relevant memories", len(memory_results.memories))
+            self.logger.info("Answer generated in %.2fs", answer_time)
 
-            # Save to memory
-            session = await self.session_service.get_session(
-                app_name=self.app_name,
-                user_id=user_id,
-                session_id=session.id
-            )
+            # Save to memory (reusing the session fetched above)
             await self.memory_service.add_session_to_memory(session)
             self.logger.debug("Session updated in memory")
 
-            total_time = time.time() - start_time
-            self.logger.info(f"Question processing complete in {total_time:.2f}s")
+            total_time = time.perf_counter() - start_time
+            self.logger.info("Question processing complete in %.2fs", total_time)
 
             return {
                 "status": "success",
@@ -367,7 +568,7 @@ class HealthReportOrchestratorWithLogging:
             }
 
         except Exception as e:
-            self.logger.error(f"Question processing failed: {str(e)}", exc_info=True)
+            self.logger.error("Question processing failed: %s", e, exc_info=True)
             self.metrics.record("question_processing_errors", 1, {"user_id": user_id})
             return {
                 "status": "error",
@@ -375,17 +576,62 @@ class HealthReportOrchestratorWithLogging:
                 "message": f"[ERROR] Failed: {str(e)}"
             }
 
+    async def prefetch_answers(self, questions: List[str], user_id: str = "default") -> None:
+        """
+        Answer likely questions ahead of time and keep the answers in the cache.
+
+        Only the answer cache is filled: no session, memory or metrics are
+        touched, so a later process_question_with_logging() call for one of
+        these questions is served from the cache and recorded as usual. A
+        question asked while its prefetch is still running joins the same
+        in-flight agent call instead of starting a second one.
+
+        Args:
+            questions (List[str]): Questions to answer (e.g. UI suggestions)
+            user_id (str): User whose lab report provides the context
+        """
+        lab_data = self.lab_reports.get(user_id)
+        keys = [self._answer_key(lab_data, question) for question in questions]
+        missing = [(key, q) for key, q in zip(keys, questions) if key not in self._answer_cache]
+        if not missing:
+            return
+
+        self.logger.info("Prefetching %d suggested answers - User: %s", len(missing), user_id)
+        answers = await asyncio.gather(
+            *(ask_general_question(question, lab_data=lab_data) for _, question in missing),
+            return_exceptions=True
+        )
+        for (key, question), answer in zip(missing, answers):
+            if isinstance(answer, Exception):
+                self.logger.warning("Prefetch failed for %r: %s", question, answer)
+            else:
+                self._answer_cache[key] = answer
+
     def get_metrics_summary(self) -> Dict[str, Any]:
         """Get summary of all tracked metrics"""
         summary = self.metrics.get_summary()
         self.logger.info("Metrics Summary:")
         for metric_name, stats in summary.items():
-            self.logger.info(f"  {metric_name}: avg={stats['average']:.2f}s, min={stats['min']:.2f}s, max={stats['max']:.2f}s, count={stats['count']}")
+            self.logger.info(
+                "  %s: avg=%.2fs, min=%.2fs, max=%.2fs, count=%d",
+                metric_name, stats['average'], stats['min'], stats['max'], stats['count']
+            )
         return summary
 
 
-# Global instance
-orchestrator_with_logging = HealthReportOrchestratorWithLogging()
+# Global instance, created on first access (PEP 562): constructing it sets up
+# logging and the session/memory services, which plain importers (e.g. app.py,
+# which builds its own instance) should not pay for
+_instances: Dict[str, HealthReportOrchestratorWithLogging] = {}
+
+
+def __getattr__(name: str) -> HealthReportOrchestratorWithLogging:
+    if name == "orchestrator_with_logging":
+        instance = _instances.get(name)
+        if instance is None:
+            instance = _instances[name] = HealthReportOrchestratorWithLogging()
+        return instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
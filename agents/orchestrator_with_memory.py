@@ -3,20 +3,26 @@ Orchestrator with Sessions & Memory
 Adds persistent conversation tracking and long-term memory storage
 """
 import sys
+import asyncio
+import zlib
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent))
 
 import config
+import orjson
 from google.adk.sessions import InMemorySessionService
 from google.adk.memory import InMemoryMemoryService
-from google.adk.runners import Runner
-from google.genai import types
-from agents.extractor_agent import extract_from_pdf, extractor_agent
-from agents.interpreter_agent import interpreter_agent
-from agents.general_qa_agent import general_qa_agent
+from agents.general_qa_agent import ask_general_question
+from agents import combined_agent
+from agents.pipeline import extract_and_interpret_pdf
+from utils.cache import TTLCache
 from typing import Optional, Dict, Any
-import json
+
+
+# Flags that count a test as abnormal in the processing summary (strict: only
+# out-of-range values, unlike the UI's ABNORMAL_FLAGS in app.py)
+ABNORMAL_FLAGS_STRICT = frozenset({'HIGH', 'LOW'})
 
 
 class HealthReportOrchestratorWithMemory:
@@ -40,10 +46,57 @@ class HealthReportOrchestratorWithMemory:
         self.app_name = "health_report_assistant"
 
         # Local state
-        self.lab_reports = {}  # Quick access to lab data
+        # Quick access to lab data; bounded and expiring so reports of users
+        # who have left do not stay in memory for the life of the process.
+        # Entries are zlib-compressed JSON (see _store_lab / get_lab_report)
+        self._lab_reports = TTLCache(maxsize=256, ttl_seconds=3600)
+        # Recently decoded reports, kept briefly so a user's follow-up
+        # questions reuse one dict (and the Q&A agent's per-report test
+        # index, which is keyed by the test list's identity)
+        self._decoded_labs = TTLCache(maxsize=16, ttl_seconds=300)
+        # (user_id, session_id) -> (truncated messages so far, events they
+        # cover); same bounds as the lab reports
+        self._history_cache = TTLCache(maxsize=256, ttl_seconds=3600)
+        # (user_id, normalized question) -> search_memory results; short TTL
+        # so repeated questions (suggestion buttons, reruns) skip the search
+        self._memory_search_cache = TTLCache(maxsize=128, ttl_seconds=300)
+        self._session_id_by_user = {}  # user_id -> default "session_<user_id>"
 
         print("[OK] Orchestrator initialized with Sessions & Memory")
 
+    def _store_lab(self, user_id: str, lab_data: Dict[str, Any]) -> None:
+        """Store a user's lab data as zlib-compressed JSON (level 1: fastest)."""
+        self._lab_reports[user_id] = zlib.compress(orjson.dumps(lab_data), 1)
+        self._decoded_labs.pop(user_id, None)
+
+    def get_lab_report(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a user's stored lab data.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            Structured lab data (as extracted), or None if there is none.
+            Repeated calls may return the same dict; treat it as read-only.
+        """
+        lab_data = self._decoded_labs.get(user_id)
+        if lab_data is not None:
+            return lab_data
+
+        raw = self._lab_reports.get(user_id)
+        if raw is None:
+            return None
+        lab_data = self._decoded_labs[user_id] = orjson.loads(zlib.decompress(raw))
+        return lab_data
+
+    def _default_session_id(self, user_id: str) -> str:
+        """Return the default session ID for a user, formatted once per user."""
+        session_id = self._session_id_by_user.get(user_id)
+        if session_id is None:
+            session_id = self._session_id_by_user[user_id] = f"session_{user_id}"
+        return session_id
+
     async def create_or_get_session(self, user_id: str, session_id: str = None):
         """
         Create or retrieve a session for a user.
@@ -56,24 +109,66 @@ class HealthReportOrchestratorWithMemory:
             Session object
         """
         if session_id is None:
-            session_id = f"session_{user_id}"
-
-        try:
+            session_id = self._default_session_id(user_id)
+
+        # Look up first (the common case); get_session returns None on a miss
+        session = await self.session_service.get_session(
+            app_name=self.app_name,
+            user_id=user_id,
+            session_id=session_id
+        )
+        if session is None:
             session = await self.session_service.create_session(
                 app_name=self.app_name,
                 user_id=user_id,
                 session_id=session_id
             )
-        except:
-            # Session already exists, retrieve it
-            session = await self.session_service.get_session(
-                app_name=self.app_name,
-                user_id=user_id,
-                session_id=session_id
-            )
 
         return session
 
+    async def _save_session_to_memory(self, session):
+        """
+        Save a session to long-term memory.
+
+        The agents run in their own throwaway sessions (see run_isolated), so
+        nothing writes to the orchestrator's session between
+        create_or_get_session and this call; the session object in hand is
+        current and is saved without re-fetching it.
+
+        Args:
+            session: Session returned by create_or_get_session
+
+        Returns:
+            The same session object
+        """
+        # Save session to memory (includes all events)
+        await self.memory_service.add_session_to_memory(session)
+        return session
+
+    async def _extract_and_interpret(self, pdf_path: str) -> Dict[str, Any]:
+        """
+        Extract and interpret a PDF, in a single model call when possible.
+
+        Tries the combined agent first (one Gemini round-trip). If its response
+        is missing or fails schema validation, falls back to the separate
+        extractor and interpreter agents (see agents.pipeline).
+
+        Args:
+            pdf_path: Path to PDF
+
+        Returns:
+            Dict with lab_data and interpretation
+        """
+        try:
+            combined = await combined_agent.extract_and_interpret_pdf(pdf_path)
+            return {
+                "lab_data": combined["structured_data"],
+                "interpretation": combined["interpretation"]
+            }
+        except ValueError as e:
+            print(f"[WARN] Combined agent failed ({e}), using separate agents")
+            return await extract_and_interpret_pdf(pdf_path)
+
     async def process_pdf_with_memory(
         self,
         pdf_path: str,
@@ -100,43 +195,36 @@ class HealthReportOrchestratorWithMemory:
             session = await self.create_or_get_session(user_id, session_id)
             print(f"[Session: {session.id}]")
 
-            # Extract data
+            # Steps 1-2: Extract data and generate interpretation (one combined
+            # model call, falling back to the two-agent pipeline)
+            # Step 3: Save to memory - independent of the report, so it runs
+            # alongside steps 1-2
             print("Step 1/3: Extracting from PDF...")
-            lab_data = await extract_from_pdf(pdf_path)
-
-            # Store in local memory
-            self.lab_reports[user_id] = lab_data
-            print("[OK] Lab data extracted\n")
-
-            # Step 2: Generate interpretation
             print("Step 2/3: Generating interpretation...")
-            from agents.interpreter_agent import interpret_lab_results
-            interpretation = await interpret_lab_results(lab_data)
-            print("[OK] Interpretation complete\n")
-
-            # Step 3: Save to memory
             print("Step 3/3: Saving to long-term memory...")
-
-            # Refresh session to get latest events (from interpretation)
-            session = await self.session_service.get_session(
-                app_name=self.app_name,
-                user_id=user_id,
-                session_id=session.id
+            pipeline_result, session = await asyncio.gather(
+                self._extract_and_interpret(pdf_path),
+                self._save_session_to_memory(session)
             )
+            lab_data = pipeline_result["lab_data"]
+            interpretation = pipeline_result["interpretation"]
 
-            # Save session to memory (includes all events)
-            await self.memory_service.add_session_to_memory(session)
+            # Store in local memory
+            self._store_lab(user_id, lab_data)
+            print("[OK] Lab data extracted")
+            print("[OK] Interpretation complete")
             print("[OK] Saved to memory\n")
 
             # Prepare summary data
             patient = lab_data.get('patient', {})
-            abnormal_tests = [t for t in lab_data.get('tests', []) if t.get('flag') in ['HIGH', 'LOW']]
+            tests = lab_data.get('tests', ())
+            abnormal_count = sum(1 for t in tests if t.get('flag') in ABNORMAL_FLAGS_STRICT)
 
             # Summary
             summary = f"""
 [REPORT PROCESSED]
    Patient: {patient.get('name', 'Unknown')}
-   Tests: {len(lab_data.get('tests', []))} total, {len(abnormal_tests)} abnormal
+   Tests: {len(tests)} total, {abnormal_count} abnormal
    Session: {session.id}
 
 [INFO] Your conversation history is now tracked!
@@ -186,44 +274,35 @@ class HealthReportOrchestratorWithMemory:
             print(f"[Session: {session.id}]")
 
             # Check for lab data
-            lab_data = self.lab_reports.get(user_id)
+            lab_data = self.get_lab_report(user_id)
             has_lab_context = lab_data is not None
 
             if has_lab_context:
                 patient = lab_data.get('patient', {})
                 print(f"[Lab context: {patient.get('name', 'Unknown')}'s report]")
 
-            # Search memory for relevant context
+            # Search memory and generate the answer concurrently
+            # (the answer does not depend on the memory search)
             print("[Searching memory...]")
-            memory_results = await self.memory_service.search_memory(
-                app_name=self.app_name,
-                user_id=user_id,
-                query=question
-            )
+            search_key = (user_id, question.strip().lower())
+            memory_results = self._memory_search_cache.get(search_key)
+            if memory_results is not None:
+                answer = await ask_general_question(question, lab_data=lab_data)
+            else:
+                memory_results, answer = await asyncio.gather(
+                    self.memory_service.search_memory(
+                        app_name=self.app_name,
+                        user_id=user_id,
+                        query=question
+                    ),
+                    ask_general_question(question, lab_data=lab_data)
+                )
+                self._memory_search_cache[search_key] = memory_results
 
             print(f"   Found {len(memory_results.memories)} relevant memories")
 
-            # Create runner with memory
-            runner = Runner(
-                agent=general_qa_agent,
-                app_name=self.app_name,
-                session_service=self.session_service,
-                memory_service=self.memory_service
-            )
-
-            # Build prompt with context
-            from agents.general_qa_agent import ask_general_question
-            answer = await ask_general_question(question, lab_data=lab_data)
-
-            # Refresh session to capture the Q&A interaction
-            session = await self.session_service.get_session(
-                app_name=self.app_name,
-                user_id=user_id,
-                session_id=session.id
-            )
-
             # Auto-save to memory
-            await self.memory_service.add_session_to_memory(session)
+            await self._save_session_to_memory(session)
 
             print("[OK] Answer saved to session & memory\n")
 
@@ -251,11 +330,13 @@ class HealthReportOrchestratorWithMemory:
             session_id: Session identifier
 
         Returns:
-            Session history
+            Session history. Only events added since the previous call are
+            converted; "messages" is the cached list itself (not a copy), so
+            treat it as read-only - later calls append to it.
         """
         try:
             if session_id is None:
-                session_id = f"session_{user_id}"
+                session_id = self._default_session_id(user_id)
 
             session = await self.session_service.get_session(
                 app_name=self.app_name,
@@ -263,8 +344,14 @@ class HealthReportOrchestratorWithMemory:
                 session_id=session_id
             )
 
-            messages = []
-            for event in session.events:
+            # Events are append-only, so only convert the ones added since the
+            # last call (start over if the session was recreated)
+            key = (user_id, session_id)
+            messages, seen = self._history_cache.get(key, ([], 0))
+            if seen > len(session.events):
+                messages, seen = [], 0
+
+            for event in session.events[seen:]:
                 if event.content and event.content.parts:
                     text = event.content.parts[0].text
                     messages.append({
@@ -272,6 +359,8 @@ class HealthReportOrchestratorWithMemory:
                         "text": text[:100] + "..." if len(text) > 100 else text
                     })
 
+            self._history_cache[key] = (messages, len(session.events))
+
             return {
                 "status": "success",
                 "session_id": session.id,
@@ -0,0 +1,76 @@
+"""
+PDF Processing Pipeline
+
+The extract -> merge -> interpret path every orchestrator uses for a PDF lab
+report. Long reports are extracted in page batches (extract_from_pdf_stream),
+a bounded number at once; the batches are merged back into one report
+(merge_extractions), and the complete report is interpreted in a single call,
+so the interpretation sees every result along with the patient details.
+Reports that fit in one batch behave exactly like calling extract_from_pdf()
+followed by interpret_lab_results().
+"""
+import sys
+import time
+from contextlib import aclosing
+from pathlib import Path
+from typing import Dict, Any
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.extractor_agent import extract_from_pdf_stream, merge_extractions
+from agents.interpreter_agent import interpret_lab_results
+
+
+async def extract_lab_data(pdf_path: str) -> Dict[str, Any]:
+    """
+    Extract a PDF lab report, in concurrent page batches when it is long.
+
+    Args:
+        pdf_path (str): Path to the PDF lab report file
+
+    Returns:
+        Dict[str, Any]: Structured data for the whole report (same shape as
+            extract_from_pdf())
+
+    Raises:
+        FileNotFoundError: If PDF file doesn't exist
+        ValueError: If a batch cannot be extracted
+    """
+    async with aclosing(extract_from_pdf_stream(pdf_path)) as stream:
+        batches = [batch async for batch in stream]
+    return merge_extractions(batches)
+
+
+async def extract_and_interpret_pdf(pdf_path: str) -> Dict[str, Any]:
+    """
+    Extract and interpret a PDF lab report.
+
+    Args:
+        pdf_path (str): Path to the PDF lab report file
+
+    Returns:
+        Dict[str, Any]: Dictionary containing:
+            - lab_data: Merged structured data (same shape as extract_from_pdf())
+            - interpretation: Interpretation with the medical disclaimer
+            - extraction_time: Seconds spent extracting
+            - interpretation_time: Seconds spent interpreting
+
+    Raises:
+        FileNotFoundError: If PDF file doesn't exist
+        ValueError: If extraction or interpretation fails
+    """
+    start = time.perf_counter()
+    lab_data = await extract_lab_data(pdf_path)
+    extraction_time = time.perf_counter() - start
+
+    interpret_start = time.perf_counter()
+    interpretation = await interpret_lab_results(lab_data)
+    interpretation_time = time.perf_counter() - interpret_start
+
+    return {
+        "lab_data": lab_data,
+        "interpretation": interpretation,
+        "extraction_time": extraction_time,
+        "interpretation_time": interpretation_time,
+    }
@@ -31,14 +31,23 @@ Security & Compliance:
 import streamlit as st
 import asyncio
 import sys
+import os
+import hashlib
+import tempfile
+import threading
+import uuid
+import weakref
 from pathlib import Path
+import numpy as np
 import pandas as pd
-import time
 from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
 
 # Add parent directory to path for module imports
 sys.path.append(str(Path(__file__).parent))
 
+import config
 from agents.orchestrator_with_logging import HealthReportOrchestratorWithLogging
 
 # Page configuration
@@ -120,6 +129,182 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Flags that mark a test result as needing attention
+ABNORMAL_FLAGS = frozenset({'HIGH', 'LOW', 'ABNORMAL', 'INSUFFICIENT'})
+
+# Abnormal flags shown with the red (danger) card; the rest get the warning card
+DANGER_FLAGS = frozenset({'HIGH', 'ABNORMAL'})
+
+
+@dataclass
+class TestSummary:
+    """
+    Lab tests split by status and category, computed in a single pass.
+
+    Attributes:
+        abnormal: Tests whose flag is in ABNORMAL_FLAGS, in report order
+        normal: All other tests, in report order
+        by_category: Category -> tests, for all / abnormal / normal tests
+    """
+    abnormal: List[Dict[str, Any]] = field(default_factory=list)
+    normal: List[Dict[str, Any]] = field(default_factory=list)
+    by_category: Dict[str, Dict[str, List[Dict[str, Any]]]] = field(
+        default_factory=lambda: {"All Tests": {}, "Abnormal Only": {}, "Normal Only": {}}
+    )
+
+    @property
+    def total_count(self) -> int:
+        return len(self.abnormal) + len(self.normal)
+
+    @property
+    def abnormal_count(self) -> int:
+        return len(self.abnormal)
+
+    @property
+    def normal_count(self) -> int:
+        return len(self.normal)
+
+
+def summarize_tests(tests: List[Dict[str, Any]]) -> TestSummary:
+    """
+    Walk the tests once, sorting them into status and category buckets.
+
+    Args:
+        tests: The 'tests' list of the extracted lab data
+
+    Returns:
+        TestSummary: Buckets used by the Summary and Lab Results tabs
+    """
+    summary = TestSummary()
+    all_groups = summary.by_category["All Tests"]
+    for test in tests:
+        if test.get('flag') in ABNORMAL_FLAGS:
+            bucket, groups = summary.abnormal, summary.by_category["Abnormal Only"]
+        else:
+            bucket, groups = summary.normal, summary.by_category["Normal Only"]
+        bucket.append(test)
+        cat = test.get('category', 'Other')
+        all_groups.setdefault(cat, []).append(test)
+        groups.setdefault(cat, []).append(test)
+    return summary
+
+
+def get_test_summary(lab_data: Dict[str, Any]) -> TestSummary:
+    """
+    Return the TestSummary for the current report, computing it once per report.
+
+    The result is kept in st.session_state together with the report it was
+    computed from (compared by identity), so tab switches and chat reruns
+    reuse it until a new report is loaded.
+
+    Args:
+        lab_data: Structured lab data of the loaded report
+
+    Returns:
+        TestSummary: Summary of lab_data['tests']
+    """
+    cached = st.session_state.get('test_summary')
+    if cached is None or cached[0] is not lab_data:
+        cached = (lab_data, summarize_tests(lab_data.get('tests', [])))
+        st.session_state.test_summary = cached
+    return cached[1]
+
+
+# HTML card for one abnormal test in the Summary tab
+CARD_TEMPLATE = """<div class="info-card {card_class}" style="color: #2c3e50;">
+    <h4 style="color: #2c3e50;">{name}</h4>
+    <p style="color: #2c3e50;"><strong>Result:</strong> {result} {unit} [{flag}]</p>
+    <p style="color: #2c3e50;"><strong>Reference:</strong> {reference_range}</p>
+</div>"""
+
+# Suggested questions shown before the first chat message: (button key,
+# button label, question sent)
+SUGGESTED_QUESTIONS = [
+    ("q1", "Why is my CRP high?", "Why is my CRP high?"),
+    ("q2", "What foods reduce inflammation?", "What foods reduce inflammation?"),
+    ("q3", "What is Vitamin D good for?", "What is Vitamin D good for?"),
+    ("q4", "Should I be concerned?", "Should I be concerned about my results?"),
+]
+
+# Cell styles for the Status column of the results tables
+_ABNORMAL_STYLE = 'background-color: #ffebee; color: #c62828; font-weight: bold'
+_NORMAL_STYLE = 'background-color: #e8f5e9; color: #2e7d32; font-weight: bold'
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def build_results_frame(tests: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Build the results table for one category from parallel column lists.
+
+    Cached by Streamlit on the content of tests, so chat messages and tab
+    switches reuse the frames until a different report is loaded.
+
+    Args:
+        tests: Tests of one category
+
+    Returns:
+        pd.DataFrame: Columns Test Name, Result, Reference Range, Status
+    """
+    names, results, refs, status = [], [], [], []
+    for test in tests:
+        names.append(test.get('name', 'N/A'))
+        results.append(f"{test.get('result', 'N/A')} {test.get('unit', '')}")
+        refs.append(test.get('reference_range', 'N/A'))
+        status.append(test.get('flag') or 'NORMAL')
+
+    return pd.DataFrame({
+        'Test Name': names,
+        'Result': results,
+        'Reference Range': refs,
+        'Status': status
+    })
+
+
+def _status_styles(status: pd.Series) -> np.ndarray:
+    """Return the cell style for each Status value (vectorized)."""
+    return np.select(
+        [status.isin(ABNORMAL_FLAGS), status.eq('NORMAL')],
+        [_ABNORMAL_STYLE, _NORMAL_STYLE],
+        default=''
+    )
+
+
+# Uploaded PDFs live in RAM-backed /dev/shm when available (Linux), else the
+# system temp dir
+_UPLOAD_DIR = Path("/dev/shm") if Path("/dev/shm").is_dir() else Path(tempfile.gettempdir())
+
+
+class UploadedPDF:
+    """
+    An uploaded PDF written to a private temporary file.
+
+    The file gets a unique name and mode 0600 (tempfile.mkstemp), so browser
+    sessions never share or read each other's reports. It is deleted by
+    remove(), when this object is garbage collected (its browser session
+    ended), or when the server process exits - whichever comes first.
+
+    Attributes:
+        path (Path): Location of the written PDF
+    """
+
+    def __init__(self, data: memoryview):
+        """
+        Write an upload to a new temporary file.
+
+        Args:
+            data (memoryview): Uploaded file content
+        """
+        fd, name = tempfile.mkstemp(prefix="upload_", suffix=".pdf", dir=_UPLOAD_DIR)
+        self.path = Path(name)
+        self._finalizer = weakref.finalize(self, self.path.unlink, missing_ok=True)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+    def remove(self) -> None:
+        """Delete the file now (e.g. when a new upload replaces it)."""
+        self._finalizer()
+
+
 # Initialize session state
 if 'orchestrator' not in st.session_state:
     st.session_state.orchestrator = HealthReportOrchestratorWithLogging(log_level="INFO")
@@ -127,12 +312,31 @@ if 'orchestrator' not in st.session_state:
     st.session_state.lab_data = None
     st.session_state.interpretation = None
     st.session_state.chat_history = []
-    st.session_state.session_id = f"web_session_{int(time.time())}"
+    st.session_state.session_id = f"web_session_{uuid.uuid4().hex}"
+    st.session_state.upload = None  # UploadedPDF for the current upload
 
 # ============================================================================
 # Async Execution Helper
 # ============================================================================
 
+@st.cache_resource
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Start the event loop that runs all agent coroutines.
+
+    Streamlit re-executes this script on every interaction, so the loop is
+    created once per process (st.cache_resource) and runs forever in a daemon
+    thread. Agent I/O and cleanup tasks keep progressing between reruns, and
+    the loop-bound HTTP clients underneath the agents stay usable.
+
+    Returns:
+        asyncio.AbstractEventLoop: The running background loop
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="agent-event-loop", daemon=True).start()
+    return loop
+
+
 def run_async(coro):
     """
     Execute an async coroutine in Streamlit's synchronous context.
@@ -147,26 +351,35 @@ def run_async(coro):
         Result from the coroutine
 
     Note:
-        - Reuses event loop across calls to prevent "Event loop is closed" errors
-        - Allows pending cleanup tasks to complete before returning
-        - Essential for Streamlit compatibility with async agent code
+        - Submits the coroutine to one persistent background loop, so there is
+          no per-call loop setup and no "event loop is already running" error
+        - Blocks the calling script run until the result is ready
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+def run_async_gen(agen):
+    """
+    Iterate an async generator from Streamlit's synchronous context.
+
+    Each item is pulled on the background loop (see run_async), so the
+    result can be passed straight to st.write_stream.
+
+    Args:
+        agen: Async generator to consume
+
+    Yields:
+        Items produced by the async generator
     """
+    loop = _background_loop()
     try:
-        # Try to get the existing event loop
-        loop = asyncio.get_event_loop()
-        if loop.is_closed():
-            raise RuntimeError("Event loop is closed")
-    except RuntimeError:
-        # Create a new event loop if none exists or it's closed
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-    # Run the coroutine and return result
-    result = loop.run_until_complete(coro)
-
-    # Don't close the loop immediately - let pending cleanup tasks complete
-    # The loop will be reused for subsequent calls
-    return result
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
 
 # Header
 st.markdown("""
@@ -176,6 +389,9 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# Main-area slot where a new report's interpretation streams in
+stream_area = st.container()
+
 # Sidebar
 with st.sidebar:
     st.markdown("### Upload Lab Report")
@@ -187,34 +403,52 @@ with st.sidebar:
     )
 
     if uploaded_file is not None:
-        # Save uploaded file
-        pdf_path = Path("temp_upload.pdf")
-        with open(pdf_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+        # Save uploaded file (reruns keep the uploader's file; only write when
+        # the content changed, replacing the previous upload's file)
+        upload = st.session_state.upload
+        upload_buffer = uploaded_file.getbuffer()
+        upload_hash = hashlib.blake2b(upload_buffer, digest_size=8).hexdigest()
+        if (upload is None or st.session_state.get('last_upload_hash') != upload_hash
+                or not upload.path.exists()):
+            if upload is not None:
+                upload.remove()
+            upload = st.session_state.upload = UploadedPDF(upload_buffer)
+            st.session_state.last_upload_hash = upload_hash
+        pdf_path = upload.path
 
         if st.button("Analyze Report", width='stretch', type="primary"):
-            with st.spinner("Analyzing your lab report..."):
-                progress_bar = st.progress(0)
-
-                # Process PDF
-                progress_bar.progress(30)
-                result = run_async(
-                    st.session_state.orchestrator.process_pdf_with_logging(
-                        str(pdf_path),
-                        user_id=st.session_state.user_id,
-                        session_id=st.session_state.session_id
+            orchestrator = st.session_state.orchestrator
+            try:
+                # Process PDF, showing the interpretation as it is generated
+                with stream_area:
+                    st.markdown("### Medical Interpretation")
+                    with st.spinner("Analyzing your lab report..."):
+                        interpretation = st.write_stream(run_async_gen(
+                            orchestrator.process_pdf_streaming(
+                                str(pdf_path),
+                                user_id=st.session_state.user_id,
+                                session_id=st.session_state.session_id
+                            )
+                        ))
+            except Exception as e:
+                st.error(f"Error: [ERROR] Failed: {str(e)}")
+            else:
+                st.session_state.lab_data = orchestrator.lab_reports[st.session_state.user_id]
+                st.session_state.interpretation = interpretation
+                st.session_state.chat_history = []  # Clear chat history for new report
+
+                # Optionally answer the suggested questions in the background
+                # so their buttons respond instantly (not awaited). Off by
+                # default: it costs one LLM call per suggestion on every upload
+                if config.PREFETCH_SUGGESTED_ANSWERS:
+                    asyncio.run_coroutine_threadsafe(
+                        orchestrator.prefetch_answers(
+                            [question for _, _, question in SUGGESTED_QUESTIONS],
+                            user_id=st.session_state.user_id
+                        ),
+                        _background_loop()
                     )
-                )
-
-                progress_bar.progress(100)
-
-                if result["status"] == "success":
-                    st.session_state.lab_data = result["data"]
-                    st.session_state.interpretation = result["interpretation"]
-                    st.session_state.chat_history = []  # Clear chat history for new report
-                    st.success("Report analyzed successfully")
-                else:
-                    st.error(f"Error: {result['message']}")
+                st.rerun()  # Re-render with the report tabs in place of the stream
 
     st.markdown("---")
     st.markdown("### About")
@@ -243,10 +477,10 @@ else:
     with tab2:
 
         # Summary metrics
-        tests = st.session_state.lab_data.get('tests', [])
-        total_tests = len(tests)
-        abnormal_tests = len([t for t in tests if t.get('flag') in ['HIGH', 'LOW', 'ABNORMAL', 'INSUFFICIENT']])
-        normal_tests = total_tests - abnormal_tests
+        test_summary = get_test_summary(st.session_state.lab_data)
+        total_tests = test_summary.total_count
+        abnormal_tests = test_summary.abnormal_count
+        normal_tests = test_summary.normal_count
 
         col1, col2, col3 = st.columns(3)
 
@@ -281,19 +515,18 @@ else:
         if abnormal_tests > 0:
             st.markdown("### Tests Requiring Attention")
 
-            abnormal = [t for t in tests if t.get('flag') in ['HIGH', 'LOW', 'ABNORMAL', 'INSUFFICIENT']]
-
-            for test in abnormal:
-                flag = test.get('flag', '')
-                card_class = 'danger-card' if flag in ['HIGH', 'ABNORMAL'] else 'warning-card'
-
-                st.markdown(f"""
-                <div class="info-card {card_class}" style="color: #2c3e50;">
-                    <h4 style="color: #2c3e50;">{test.get('name', 'N/A')}</h4>
-                    <p style="color: #2c3e50;"><strong>Result:</strong> {test.get('result', 'N/A')} {test.get('unit', '')} [{flag}]</p>
-                    <p style="color: #2c3e50;"><strong>Reference:</strong> {test.get('reference_range', 'N/A')}</p>
-                </div>
-                """, unsafe_allow_html=True)
+            # All cards in one markdown element instead of one per test
+            st.markdown("\n".join(
+                CARD_TEMPLATE.format(
+                    card_class='danger-card' if test.get('flag', '') in DANGER_FLAGS else 'warning-card',
+                    name=test.get('name', 'N/A'),
+                    result=test.get('result', 'N/A'),
+                    unit=test.get('unit', ''),
+                    flag=test.get('flag', ''),
+                    reference_range=test.get('reference_range', 'N/A')
+                )
+                for test in test_summary.abnormal
+            ), unsafe_allow_html=True)
         else:
             st.success("All test results are within normal range")
 
@@ -343,53 +576,17 @@ else:
                 ["All Tests", "Abnormal Only", "Normal Only"]
             )
 
-        # Prepare test data
-        tests = st.session_state.lab_data.get('tests', [])
-
-        # Filter based on selection
-        if filter_option == "Abnormal Only":
-            tests = [t for t in tests if t.get('flag') in ['HIGH', 'LOW', 'ABNORMAL', 'INSUFFICIENT']]
-        elif filter_option == "Normal Only":
-            tests = [t for t in tests if t.get('flag') not in ['HIGH', 'LOW', 'ABNORMAL', 'INSUFFICIENT'] or t.get('flag') is None]
+        # Tests matching the selected filter, grouped by category
+        categories = get_test_summary(st.session_state.lab_data).by_category[filter_option]
 
         # Display tests in a nice table
-        if tests:
-            # Group by category
-            categories = {}
-            for test in tests:
-                cat = test.get('category', 'Other')
-                if cat not in categories:
-                    categories[cat] = []
-                categories[cat].append(test)
-
+        if categories:
             for category, cat_tests in categories.items():
                 with st.expander(f"{category} ({len(cat_tests)} tests)", expanded=True):
-                    # Create DataFrame
-                    df_data = []
-                    for test in cat_tests:
-                        flag = test.get('flag', 'NORMAL')
-                        if flag is None:
-                            flag = 'NORMAL'
-
-                        df_data.append({
-                            'Test Name': test.get('name', 'N/A'),
-                            'Result': f"{test.get('result', 'N/A')} {test.get('unit', '')}",
-                            'Reference Range': test.get('reference_range', 'N/A'),
-                            'Status': flag
-                        })
-
-                    df = pd.DataFrame(df_data)
+                    df = build_results_frame(cat_tests)
 
-                    # Style the dataframe
-                    def highlight_status(val):
-                        if val in ['HIGH', 'LOW', 'ABNORMAL', 'INSUFFICIENT']:
-                            return 'background-color: #ffebee; color: #c62828; font-weight: bold'
-                        elif val == 'NORMAL':
-                            return 'background-color: #e8f5e9; color: #2e7d32; font-weight: bold'
-                        else:
-                            return ''
-
-                    styled_df = df.style.map(highlight_status, subset=['Status'])
+                    # Style the Status column in one vectorized call
+                    styled_df = df.style.apply(_status_styles, subset=['Status'])
                     st.dataframe(styled_df, width='stretch', hide_index=True)
         else:
             st.info("No tests found matching the filter criteria.")
@@ -403,88 +600,29 @@ else:
         # Quick question suggestions (only show when no chat history)
         if len(st.session_state.chat_history) == 0:
             st.markdown("**Suggested Questions:**")
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("Why is my CRP high?", width='stretch', key="q1"):
-                    st.session_state.chat_history.append({
-                        "role": "user",
-                        "content": "Why is my CRP high?"
-                    })
-                    with st.spinner("Thinking..."):
-                        result = run_async(
-                            st.session_state.orchestrator.process_question_with_logging(
-                                "Why is my CRP high?",
-                                user_id=st.session_state.user_id,
-                                session_id=st.session_state.session_id
-                            )
-                        )
-                        if result["status"] == "success":
-                            st.session_state.chat_history.append({
-                                "role": "assistant",
-                                "content": result["answer"]
-                            })
-                            st.rerun()
-
-                if st.button("What foods reduce inflammation?", width='stretch', key="q2"):
-                    st.session_state.chat_history.append({
-                        "role": "user",
-                        "content": "What foods reduce inflammation?"
-                    })
-                    with st.spinner("Thinking..."):
-                        result = run_async(
-                            st.session_state.orchestrator.process_question_with_logging(
-                                "What foods reduce inflammation?",
-                                user_id=st.session_state.user_id,
-                                session_id=st.session_state.session_id
-                            )
-                        )
-                        if result["status"] == "success":
-                            st.session_state.chat_history.append({
-                                "role": "assistant",
-                                "content": result["answer"]
-                            })
-                            st.rerun()
-
-            with col2:
-                if st.button("What is Vitamin D good for?", width='stretch', key="q3"):
-                    st.session_state.chat_history.append({
-                        "role": "user",
-                        "content": "What is Vitamin D good for?"
-                    })
-                    with st.spinner("Thinking..."):
-                        result = run_async(
-                            st.session_state.orchestrator.process_question_with_logging(
-                                "What is Vitamin D good for?",
-                                user_id=st.session_state.user_id,
-                                session_id=st.session_state.session_id
-                            )
-                        )
-                        if result["status"] == "success":
-                            st.session_state.chat_history.append({
-                                "role": "assistant",
-                                "content": result["answer"]
-                            })
-                            st.rerun()
-
-                if st.button("Should I be concerned?", width='stretch', key="q4"):
-                    st.session_state.chat_history.append({
-                        "role": "user",
-                        "content": "Should I be concerned about my results?"
-                    })
-                    with st.spinner("Thinking..."):
-                        result = run_async(
-                            st.session_state.orchestrator.process_question_with_logging(
-                                "Should I be concerned about my results?",
-                                user_id=st.session_state.user_id,
-                                session_id=st.session_state.session_id
+            columns = st.columns(2)
+            for i, (key, label, question) in enumerate(SUGGESTED_QUESTIONS):
+                with columns[i // 2]:
+                    if st.button(label, width='stretch', key=key):
+                        st.session_state.chat_history.append({
+                            "role": "user",
+                            "content": question
+                        })
+                        with st.spinner("Thinking..."):
+                            # A cache hit when PREFETCH_SUGGESTED_ANSWERS is on
+                            result = run_async(
+                                st.session_state.orchestrator.process_question_with_logging(
+                                    question,
+                                    user_id=st.session_state.user_id,
+                                    session_id=st.session_state.session_id
+                                )
                             )
-                        )
-                        if result["status"] == "success":
-                            st.session_state.chat_history.append({
-                                "role": "assistant",
-                                "content": result["answer"]
-                            })
-                            st.rerun()
+                            if result["status"] == "success":
+                                st.session_state.chat_history.append({
+                                    "role": "assistant",
+                                    "content": result["answer"]
+                                })
+                                st.rerun()
 
         # Chat input at bottom
         user_question = st.chat_input("Ask a question about your report...")
@@ -10,6 +10,8 @@ Environment Variables:
 - GOOGLE_CLOUD_LOCATION (optional): Cloud location, defaults to 'global'
 - GOOGLE_GENAI_USE_VERTEXAI (optional): Whether to use Vertex AI (0 or 1)
 - LOG_LEVEL (optional): Logging verbosity level, defaults to 'INFO'
+- PREFETCH_SUGGESTED_ANSWERS (optional): Answer the web UI's suggested
+  questions in the background after each upload (0 or 1), defaults to 0
 
 Security:
 - API keys are never logged in full (only first 20 and last 4 characters shown)
@@ -20,7 +22,10 @@ Usage:
     from config import GOOGLE_API_KEY, LOG_LEVEL
     # Configuration is automatically loaded when this module is imported
 """
+import functools
 import os
+import sys
+from types import MappingProxyType
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -30,28 +35,67 @@ env_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
 # ============================================================================
-# API Configuration
+# Configuration Loading
 # ============================================================================
 
-# Google AI API key for Gemini model access
-# Required for all agent functionality
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 
-# Google Cloud location for API requests
-# Defaults to 'global' for worldwide access
-GOOGLE_CLOUD_LOCATION = os.getenv('GOOGLE_CLOUD_LOCATION', 'global')
+@functools.lru_cache(maxsize=1)
+def _load_config() -> MappingProxyType:
+    """
+    Read and parse the configuration environment variables once.
+
+    The result is cached, so repeated calls (e.g. from modules or workers
+    that need the settings) do not re-read or re-parse the environment.
+
+    Returns:
+        MappingProxyType: Read-only mapping of configuration names to values
+    """
+    return MappingProxyType({
+        # Google AI API key for Gemini model access
+        # Required for all agent functionality
+        'GOOGLE_API_KEY': os.getenv('GOOGLE_API_KEY'),
+
+        # Google Cloud location for API requests
+        # Defaults to 'global' for worldwide access
+        'GOOGLE_CLOUD_LOCATION': os.getenv('GOOGLE_CLOUD_LOCATION', 'global'),
+
+        # Flag to determine whether to use Vertex AI or AI Studio
+        # 0 = AI Studio (default), 1 = Vertex AI
+        'GOOGLE_GENAI_USE_VERTEXAI': int(os.getenv('GOOGLE_GENAI_USE_VERTEXAI', '0')),
+
+        # Logging level for application-wide logging
+        # Options: DEBUG, INFO, WARNING, ERROR, CRITICAL
+        'LOG_LEVEL': os.getenv('LOG_LEVEL', 'INFO'),
+
+        # Whether the web UI answers its suggested questions right after an
+        # upload so their buttons respond instantly
+        # 0 = off (default), 1 = on; costs one extra LLM call per suggested
+        # question on every upload, whether or not the buttons are clicked
+        'PREFETCH_SUGGESTED_ANSWERS': int(os.getenv('PREFETCH_SUGGESTED_ANSWERS', '0')),
+    })
+
+
+_config = _load_config()
 
-# Flag to determine whether to use Vertex AI or AI Studio
-# 0 = AI Studio (default), 1 = Vertex AI
-GOOGLE_GENAI_USE_VERTEXAI = int(os.getenv('GOOGLE_GENAI_USE_VERTEXAI', '0'))
+# ============================================================================
+# API Configuration
+# ============================================================================
+
+GOOGLE_API_KEY = _config['GOOGLE_API_KEY']
+GOOGLE_CLOUD_LOCATION = _config['GOOGLE_CLOUD_LOCATION']
+GOOGLE_GENAI_USE_VERTEXAI = _config['GOOGLE_GENAI_USE_VERTEXAI']
 
 # ============================================================================
 # Logging Configuration
 # ============================================================================
 
-# Logging level for application-wide logging
-# Options: DEBUG, INFO, WARNING, ERROR, CRITICAL
-LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_LEVEL = _config['LOG_LEVEL']
+
+# ============================================================================
+# Web UI Configuration
+# ============================================================================
+
+PREFETCH_SUGGESTED_ANSWERS = _config['PREFETCH_SUGGESTED_ANSWERS']
 
 # ============================================================================
 # Validation
@@ -72,16 +116,25 @@ if not GOOGLE_API_KEY:
 
 # Set environment variables for Agent Development Kit (ADK) consumption
 # ADK libraries read these environment variables directly
-os.environ['GOOGLE_API_KEY'] = GOOGLE_API_KEY
-os.environ['GOOGLE_CLOUD_LOCATION'] = GOOGLE_CLOUD_LOCATION
-os.environ['GOOGLE_GENAI_USE_VERTEXAI'] = str(GOOGLE_GENAI_USE_VERTEXAI)
+# Only values that differ are written (usually they already match)
+for _key, _value in (
+    ('GOOGLE_API_KEY', GOOGLE_API_KEY),
+    ('GOOGLE_CLOUD_LOCATION', GOOGLE_CLOUD_LOCATION),
+    ('GOOGLE_GENAI_USE_VERTEXAI', str(GOOGLE_GENAI_USE_VERTEXAI)),
+):
+    if os.environ.get(_key) != _value:
+        os.environ[_key] = _value
 
 # ============================================================================
 # Startup Confirmation
 # ============================================================================
 
 # Log successful configuration load (with API key partially masked for security)
-print("[OK] Configuration loaded successfully")
-print(f"   API Key: {GOOGLE_API_KEY[:20]}...{GOOGLE_API_KEY[-4:]}")
-print(f"   Location: {GOOGLE_CLOUD_LOCATION}")
-print(f"   Use Vertex AI: {bool(GOOGLE_GENAI_USE_VERTEXAI)}")
+# Shown only at DEBUG/INFO verbosity, as a single write rather than one per line
+if LOG_LEVEL.upper() in ('DEBUG', 'INFO'):
+    sys.stdout.write(
+        "[OK] Configuration loaded successfully\n"
+        f"   API Key: {GOOGLE_API_KEY[:20]}...{GOOGLE_API_KEY[-4:]}\n"
+        f"   Location: {GOOGLE_CLOUD_LOCATION}\n"
+        f"   Use Vertex AI: {bool(GOOGLE_GENAI_USE_VERTEXAI)}\n"
+    )
@@ -3,19 +3,46 @@ PDF Processing Utilities
 Handles PDF text extraction and image processing
 """
 import fitz  # PyMuPDF
-import pdfplumber
 from PIL import Image
 import io
 import base64
 from pathlib import Path
+from typing import Iterator
 
 
-def extract_text_from_pdf(pdf_path: str) -> dict:
+# Text extraction flags for page.get_text: only what plain text for the LLM
+# needs (no image blocks, no dehyphenation, text outside the page clipped)
+_TEXT_FLAGS = fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
+
+# Separator between pages in full_text
+_PAGE_SEP = "\n\n--- PAGE BREAK ---\n\n"
+
+# Read size for streaming base64 encoding (multiple of 3 bytes)
+_B64_CHUNK_SIZE = 57 * 1024
+
+# pdfplumber module, imported on first use: it pulls in pdfminer.six's layout
+# engine, which most runs never need
+_PDFPLUMBER = None
+
+
+def _get_pdfplumber():
+    """Import pdfplumber on first use and return the module."""
+    global _PDFPLUMBER
+    if _PDFPLUMBER is None:
+        import pdfplumber
+        _PDFPLUMBER = pdfplumber
+    return _PDFPLUMBER
+
+
+def extract_text_from_pdf(pdf_path: str, prefer: str = "fast") -> dict:
     """
     Extract text from PDF using multiple methods for robustness.
 
     Args:
         pdf_path: Path to PDF file
+        prefer: "fast" (default) uses PyMuPDF and only falls back to
+            pdfplumber if PyMuPDF cannot read the file; "tables" goes straight
+            to pdfplumber, which keeps table layouts better but is much slower
 
     Returns:
         dict with:
@@ -29,33 +56,76 @@ def extract_text_from_pdf(pdf_path: str) -> dict:
     if not pdf_path.exists():
         raise FileNotFoundError(f"PDF not found: {pdf_path}")
 
+    if prefer not in ("fast", "tables"):
+        raise ValueError(f"prefer must be 'fast' or 'tables', got {prefer!r}")
+
     # Try PyMuPDF first (fast and reliable)
-    try:
-        return _extract_with_pymupdf(pdf_path)
-    except Exception as e:
-        print(f"⚠️  PyMuPDF failed: {e}, trying pdfplumber...")
+    if prefer == "fast":
+        try:
+            return _extract_with_pymupdf(pdf_path)
+        except (fitz.FileDataError, RuntimeError) as e:
+            print(f"⚠️  PyMuPDF failed: {e}, trying pdfplumber...")
 
-    # Fallback to pdfplumber
+    # pdfplumber: fallback, or requested for table-heavy reports
     try:
         return _extract_with_pdfplumber(pdf_path)
     except Exception as e:
         raise Exception(f"All PDF extraction methods failed: {e}")
 
 
-def _extract_with_pymupdf(pdf_path: Path) -> dict:
-    """Extract text using PyMuPDF (fitz)"""
-    doc = fitz.open(pdf_path)
-    pages = []
+def iter_pages(pdf_path: str) -> Iterator[str]:
+    """
+    Iterate over the text of a PDF one page at a time (PyMuPDF).
 
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        text = page.get_text()
-        pages.append(text)
+    The pages are never all held in memory by this iterator, so callers
+    that chunk or send text page by page use O(page) memory (the PyMuPDF
+    path of extract_text_from_pdf collects them into a list). The file is
+    checked and opened right away, so a missing or unreadable PDF raises
+    here rather than on the first next(); the document stays open until
+    the iterator is exhausted or closed.
 
-    doc.close()
+    Args:
+        pdf_path: Path to PDF file
+
+    Returns:
+        Iterator over the text of each page, in order ("" for pages without
+        content)
+
+    Raises:
+        FileNotFoundError: If PDF file doesn't exist
+    """
+    pdf_path = Path(pdf_path)
+
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"PDF not found: {pdf_path}")
+
+    return _iter_page_texts(fitz.open(pdf_path))
+
+
+def _iter_page_texts(doc: "fitz.Document") -> Iterator[str]:
+    """Yield the text of each page of an open document, then close it."""
+    try:
+        for page in doc:
+            yield _pymupdf_page_text(page)
+    finally:
+        doc.close()
+
+
+def _pymupdf_page_text(page: "fitz.Page") -> str:
+    """Plain text of one page; pages without a content stream are skipped."""
+    # Blank pages (e.g. scanned appendix separators) have no content stream,
+    # so there is nothing for the text device to walk
+    if not page.get_contents():
+        return ""
+    return page.get_text("text", flags=_TEXT_FLAGS, sort=False)
+
+
+def _extract_with_pymupdf(pdf_path: Path) -> dict:
+    """Extract text using PyMuPDF (fitz)"""
+    pages = list(iter_pages(pdf_path))
 
     return {
-        "full_text": "\n\n--- PAGE BREAK ---\n\n".join(pages),
+        "full_text": _PAGE_SEP.join(pages),
         "pages": pages,
         "page_count": len(pages),
         "method": "PyMuPDF"
@@ -66,56 +136,135 @@ def _extract_with_pdfplumber(pdf_path: Path) -> dict:
     """Extract text using pdfplumber (better for tables)"""
     pages = []
 
-    with pdfplumber.open(pdf_path) as pdf:
+    # Opened without laparams (pdfplumber's default), so pdfminer's layout
+    # analysis stays off; extract_text groups characters into lines itself.
+    # Passing any laparams would turn that slow pass on.
+    with _get_pdfplumber().open(pdf_path) as pdf:
         for page in pdf.pages:
             text = page.extract_text()
             pages.append(text if text else "")
 
     return {
-        "full_text": "\n\n--- PAGE BREAK ---\n\n".join(pages),
+        "full_text": _PAGE_SEP.join(pages),
         "pages": pages,
         "page_count": len(pages),
         "method": "pdfplumber"
     }
 
 
-def extract_images_from_pdf(pdf_path: str) -> list:
+def extract_images_from_pdf(pdf_path: str, encode: bool = True, metadata_only: bool = False) -> list:
     """
     Extract images from PDF for potential OCR or analysis.
 
     Args:
         pdf_path: Path to PDF file
+        encode: Return image data base64 encoded (default). Pass False to
+            get the raw image bytes and skip the encoding work.
+        metadata_only: Skip decoding the images entirely and only describe
+            them (no format or data); use when just counting or locating images
 
     Returns:
         List of dicts with image info:
             - page_num: Page number (0-indexed)
             - image_index: Image index on page
-            - format: Image format (png, jpeg, etc.)
-            - data: Base64 encoded image data
+            - xref: PDF object number of the image
+            - width, height: Image size in pixels
+            - format: Image format (png, jpeg, etc.) - unless metadata_only
+            - data: Base64 encoded image data (raw bytes if encode=False) -
+              unless metadata_only
     """
     pdf_path = Path(pdf_path)
     doc = fitz.open(pdf_path)
     images = []
+    # xref -> (format, data): images reused across pages (logos, headers)
+    # are decoded and encoded once, and their entries share the data
+    decoded = {}
 
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        image_list = page.get_images()
+    for page_num, page in enumerate(doc):
+        images.extend(_page_images(doc, page, page_num, decoded, encode, metadata_only))
 
-        for img_index, img in enumerate(image_list):
-            xref = img[0]
-            base_image = doc.extract_image(xref)
+    doc.close()
+    return images
 
-            images.append({
-                "page_num": page_num,
-                "image_index": img_index,
-                "format": base_image["ext"],
-                "data": base64.b64encode(base_image["image"]).decode('utf-8')
-            })
 
-    doc.close()
+def _page_images(
+    doc: "fitz.Document",
+    page: "fitz.Page",
+    page_num: int,
+    decoded: dict,
+    encode: bool,
+    metadata_only: bool
+) -> list:
+    """Describe (and unless metadata_only, decode) the images on one page."""
+    images = []
+
+    for img_index, img in enumerate(page.get_images()):
+        xref, width, height = img[0], img[2], img[3]
+        info = {
+            "page_num": page_num,
+            "image_index": img_index,
+            "xref": xref,
+            "width": width,
+            "height": height
+        }
+
+        if not metadata_only:
+            if xref not in decoded:
+                # extract_image decompresses the stream - the expensive part
+                base_image = doc.extract_image(xref)
+                decoded[xref] = (
+                    base_image["ext"],
+                    base64.b64encode(base_image["image"]).decode('ascii')
+                    if encode else base_image["image"]
+                )
+            info["format"], info["data"] = decoded[xref]
+
+        images.append(info)
+
     return images
 
 
+def extract_all(pdf_path: str, encode: bool = True, metadata_only: bool = False) -> dict:
+    """
+    Extract text and images from a PDF in a single pass (PyMuPDF).
+
+    Use instead of calling extract_text_from_pdf and extract_images_from_pdf
+    on the same file, which opens and parses the document twice.
+
+    Args:
+        pdf_path: Path to PDF file
+        encode: As for extract_images_from_pdf
+        metadata_only: As for extract_images_from_pdf
+
+    Returns:
+        dict with the keys of extract_text_from_pdf (full_text, pages,
+        page_count, method) plus:
+            - images: Image dicts as returned by extract_images_from_pdf
+    """
+    pdf_path = Path(pdf_path)
+
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"PDF not found: {pdf_path}")
+
+    images = []
+    decoded = {}
+
+    with fitz.open(pdf_path) as doc:
+        pages = [None] * len(doc)
+
+        for page_num, page in enumerate(doc):
+            pages[page_num] = _pymupdf_page_text(page)
+            images.extend(_page_images(doc, page, page_num, decoded, encode, metadata_only))
+
+    return {
+        "full_text": _PAGE_SEP.join(pages),
+        "pages": pages,
+        "page_count": len(pages),
+        "method": "PyMuPDF",
+        "images": images
+    }
+
+
 def pdf_to_base64(pdf_path: str) -> str:
     """
     Convert PDF to base64 for sending to Gemini multimodal API.
@@ -128,18 +277,18 @@ def pdf_to_base64(pdf_path: str) -> str:
     """
     pdf_path = Path(pdf_path)
 
+    # Encode in chunks whose size is a multiple of 3 bytes, so no chunk is
+    # padded mid-stream and the raw PDF is never held in memory as a whole
+    encoded = bytearray()
     with open(pdf_path, 'rb') as f:
-        pdf_bytes = f.read()
+        while chunk := f.read(_B64_CHUNK_SIZE):
+            encoded += base64.b64encode(chunk)
 
-    return base64.b64encode(pdf_bytes).decode('utf-8')
+    return encoded.decode('ascii')
 
 
-def create_sample_lab_report_text() -> str:
-    """
-    Creates a sample lab report text for testing when no PDF is available.
-    This simulates extracted text from a typical lab report.
-    """
-    return """
+# Sample lab report text (see create_sample_lab_report_text)
+_SAMPLE_LAB_REPORT = """
 CITY MEDICAL LABORATORY
 123 Health Street, Medical City, ST 12345
 Phone: (555) 123-4567
@@ -207,6 +356,14 @@ END OF REPORT
 """
 
 
+def create_sample_lab_report_text() -> str:
+    """
+    Creates a sample lab report text for testing when no PDF is available.
+    This simulates extracted text from a typical lab report.
+    """
+    return _SAMPLE_LAB_REPORT
+
+
 if __name__ == "__main__":
     # Quick test
     print("PDF Utils Module Loaded")
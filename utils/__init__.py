@@ -2,5 +2,6 @@
 Utility modules for Health Report Assistant
 """
 from .logging_config import setup_logging, get_logger, metrics_tracker
+from .cache import LRUCache, TTLCache, content_hash
 
-__all__ = ['setup_logging', 'get_logger', 'metrics_tracker']
+__all__ = ['setup_logging', 'get_logger', 'metrics_tracker', 'LRUCache', 'TTLCache', 'content_hash']
@@ -0,0 +1,135 @@
+"""
+In-Process Caching Helpers
+
+Small in-process caches for results that are expensive to recompute
+(LLM responses in particular). Entries are keyed by a hash of the request
+content, so an edited report or question naturally maps to a new key and
+stale entries simply age out.
+
+Components:
+- LRUCache: bounded dict that evicts the least recently used entry
+- TTLCache: LRUCache whose entries also expire after a fixed lifetime
+- content_hash: stable digest of JSON-serializable request content
+
+Usage:
+    from utils.cache import LRUCache, content_hash
+
+    _cache = LRUCache(maxsize=512)
+    key = content_hash(structured_data, question)
+    answer = _cache.get(key)
+    if answer is None:
+        answer = await ask(...)
+        _cache[key] = answer
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+import orjson
+
+
+class LRUCache(OrderedDict):
+    """
+    Bounded mapping that evicts the least recently used entry when full.
+
+    Reads through get() or [] mark an entry as recently used; writes insert
+    or refresh an entry and evict the oldest one once maxsize is exceeded.
+
+    Attributes:
+        maxsize (int): Maximum number of entries kept
+    """
+
+    def __init__(self, maxsize: int = 128):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept. Defaults to 128.
+        """
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Return the cached value for key (marking it recently used), else default."""
+        if key in self:
+            return self[key]
+        return default
+
+
+class TTLCache(LRUCache):
+    """
+    LRUCache whose entries expire ttl_seconds after they were written.
+
+    Expired entries are dropped lazily when they are looked up. Useful for
+    values that are only valid for a while, such as server-side file handles.
+
+    Attributes:
+        maxsize (int): Maximum number of entries kept
+        ttl_seconds (float): Lifetime of each entry
+    """
+
+    def __init__(self, maxsize: int = 128, ttl_seconds: float = 3600):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept. Defaults to 128.
+            ttl_seconds (float): Lifetime of each entry. Defaults to 1 hour.
+        """
+        super().__init__(maxsize)
+        self.ttl_seconds = ttl_seconds
+
+    def __getitem__(self, key: Hashable) -> Any:
+        expires_at, value = super().__getitem__(key)
+        if time.monotonic() >= expires_at:
+            del self[key]
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        super().__setitem__(key, (time.monotonic() + self.ttl_seconds, value))
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Return the cached value for key if present and not expired, else default."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+def content_hash(*parts: Any) -> str:
+    """
+    Return a stable digest of JSON-serializable content.
+
+    Dicts are serialized with sorted keys (orjson, compact output), so two
+    structurally equal payloads always produce the same key regardless of
+    key order. Values orjson cannot serialize natively fall back to str().
+
+    Args:
+        *parts: Values to hash together (dicts, lists, strings, None, ...)
+
+    Returns:
+        str: Hex digest identifying the content
+
+    Example:
+        >>> content_hash({"a": 1, "b": 2}, "why?") == content_hash({"b": 2, "a": 1}, "why?")
+        True
+    """
+    canonical = orjson.dumps(
+        parts,
+        option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC,
+        default=str
+    )
+    return hashlib.blake2b(canonical, digest_size=16).hexdigest()
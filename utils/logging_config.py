@@ -28,10 +28,31 @@ Usage:
     metrics_tracker.record("api_response_time", 0.5, {"endpoint": "/analyze"})
     summary = metrics_tracker.get_summary()
 """
+import atexit
 import logging
+import logging.handlers
+import math
+import queue
 import sys
-from datetime import datetime
-from typing import Optional, Dict, List, Any
+import threading
+import time
+from collections import deque
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Iterable, Tuple, Deque
+
+
+# Most recent entries kept per metric by MetricsTracker (default)
+MAX_METRIC_ENTRIES = 10_000
+
+# Log file rotation: size at which the file rolls over, and rotated files kept
+LOG_FILE_MAX_BYTES = 10 * 1024 * 1024
+LOG_FILE_BACKUP_COUNT = 5
+
+# Background listener writing file log records (see setup_logging)
+_file_listener: Optional[logging.handlers.QueueListener] = None
+
+# Shared read-only tags for entries recorded without tags
+_EMPTY_TAGS = MappingProxyType({})
 
 
 class ColoredFormatter(logging.Formatter):
@@ -89,6 +110,8 @@ def setup_logging(level: str = "INFO", log_file: Optional[str] = None) -> loggin
 
         log_file (Optional[str]): Path to log file for persistent logging.
             If None, logs only to console. Useful for production environments.
+            The file rotates at LOG_FILE_MAX_BYTES and is written by a
+            background thread, so logging calls never wait on disk I/O.
 
     Returns:
         logging.Logger: Configured logger instance for the application
@@ -124,16 +147,43 @@ def setup_logging(level: str = "INFO", log_file: Optional[str] = None) -> loggin
     console_handler.setFormatter(formatter)
     logger.addHandler(console_handler)
 
+    # Stop the file listener from a previous call (flushes its queue)
+    global _file_listener
+    if _file_listener is not None:
+        _file_listener.stop()
+        for handler in _file_listener.handlers:
+            handler.close()
+        _file_listener = None
+
     # File handler for persistent logging (optional)
+    # Records are queued by the calling thread and written to the rotating
+    # file by a QueueListener thread
     if log_file:
-        file_handler = logging.FileHandler(log_file)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file,
+            maxBytes=LOG_FILE_MAX_BYTES,
+            backupCount=LOG_FILE_BACKUP_COUNT
+        )
         file_handler.setLevel(getattr(logging, level.upper()))
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+
+        log_queue = queue.SimpleQueue()
+        _file_listener = logging.handlers.QueueListener(
+            log_queue, file_handler, respect_handler_level=True
+        )
+        _file_listener.start()
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
 
     return logger
 
 
+@atexit.register
+def _stop_file_listener() -> None:
+    """Flush queued file log records at interpreter exit."""
+    if _file_listener is not None:
+        _file_listener.stop()
+
+
 def get_logger(name: str = "health_report_assistant") -> logging.Logger:
     """
     Get a logger instance for a specific module or component.
@@ -162,15 +212,22 @@ class MetricsTracker:
     Tracks numeric metrics with timestamps and optional tags for filtering.
     Provides statistical aggregation (average, min, max, count) for analysis.
 
+    Summary statistics (count, sum, min, max) are kept up to date as values
+    are recorded, so get_average and get_summary are O(1) per metric and
+    cover every value ever recorded, not just the retained history.
+
     Attributes:
-        metrics (Dict[str, List[Dict]]): Stored metrics organized by metric name.
-            Each entry contains: value, timestamp, and tags
+        metrics (Dict[str, Deque[Dict]]): Stored metrics organized by metric name.
+            Each entry contains: value, ts_ns (time.monotonic_ns() when
+            recorded, for ordering and durations), and tags
+        max_entries (int): Most recent entries kept per metric
 
     Production Considerations:
         - Metrics are stored in memory (lost on restart)
         - For production, consider exporting to monitoring systems
           (Prometheus, CloudWatch, Datadog, etc.)
-        - No automatic cleanup of old metrics (memory grows over time)
+        - Only the last max_entries values per metric are kept (older
+          entries are dropped, so memory stays bounded)
         - Thread-safe for concurrent metric recording
 
     Example:
@@ -182,9 +239,18 @@ class MetricsTracker:
         0.275
     """
 
-    def __init__(self):
-        """Initialize an empty metrics tracker."""
-        self.metrics: Dict[str, List[Dict[str, Any]]] = {}
+    def __init__(self, max_entries: int = MAX_METRIC_ENTRIES):
+        """
+        Initialize an empty metrics tracker.
+
+        Args:
+            max_entries (int): Most recent entries kept per metric
+        """
+        self.max_entries = max_entries
+        self.metrics: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}  # metric -> count/sum/min/max
+        self._lock = threading.Lock()
+        self._logger = get_logger()
 
     def record(
         self,
@@ -205,21 +271,60 @@ class MetricsTracker:
             >>> tracker.record("extraction_time", 1.5, {"user_id": "user123"})
             [2025-01-15 10:30:45] INFO - METRIC - extraction_time: 1.50 {'user_id': 'user123'}
         """
-        # Initialize metric list if first time seeing this metric name
-        if metric_name not in self.metrics:
-            self.metrics[metric_name] = []
-
-        # Create metric entry with value, timestamp, and tags
-        entry = {
-            "value": value,
-            "timestamp": datetime.now(),
-            "tags": tags or {}
-        }
-        self.metrics[metric_name].append(entry)
-
-        # Log the metric for real-time monitoring
-        logger = get_logger()
-        logger.info(f"METRIC - {metric_name}: {value:.2f} {tags or ''}")
+        self.record_many([(metric_name, value, tags)])
+
+    def record_many(
+        self,
+        entries: Iterable[Tuple[str, float, Optional[Dict[str, Any]]]]
+    ) -> None:
+        """
+        Record several metric values at once, taking the lock a single time.
+
+        Useful for flushing the metrics collected over one request when it
+        completes, instead of contending for the lock once per metric.
+
+        Args:
+            entries: (metric_name, value, tags) tuples, as passed to record()
+
+        Example:
+            >>> tracker.record_many([
+            ...     ("extraction_time", 1.5, {"user_id": "user123"}),
+            ...     ("interpretation_time", 2.0, {"user_id": "user123"}),
+            ... ])
+        """
+        entries = list(entries)
+        ts_ns = time.monotonic_ns()
+
+        with self._lock:
+            for metric_name, value, tags in entries:
+                # Create metric entry with value, timestamp, and tags
+                history = self.metrics.get(metric_name)
+                if history is None:
+                    history = self.metrics[metric_name] = deque(maxlen=self.max_entries)
+                history.append({
+                    "value": value,
+                    "ts_ns": ts_ns,
+                    "tags": tags or _EMPTY_TAGS
+                })
+
+                # Update the running aggregates
+                stats = self._stats.get(metric_name)
+                if stats is None:
+                    stats = self._stats[metric_name] = {
+                        "count": 0, "sum": 0.0, "min": math.inf, "max": -math.inf
+                    }
+                stats["count"] += 1
+                stats["sum"] += value
+                if value < stats["min"]:
+                    stats["min"] = value
+                if value > stats["max"]:
+                    stats["max"] = value
+
+        # Log the metrics for real-time monitoring (outside the lock); skipped
+        # entirely when INFO is filtered, and formatted lazily otherwise
+        if self._logger.isEnabledFor(logging.INFO):
+            for metric_name, value, tags in entries:
+                self._logger.info("METRIC - %s: %.2f %s", metric_name, value, tags or "")
 
     def get_average(self, metric_name: str) -> float:
         """
@@ -237,11 +342,11 @@ class MetricsTracker:
             >>> print(tracker.get_average("latency"))
             1.5
         """
-        if metric_name not in self.metrics:
-            return 0.0
-
-        values = [m["value"] for m in self.metrics[metric_name]]
-        return sum(values) / len(values) if values else 0.0
+        with self._lock:
+            stats = self._stats.get(metric_name)
+            if not stats:
+                return 0.0
+            return stats["sum"] / stats["count"]
 
     def get_summary(self) -> Dict[str, Dict[str, float]]:
         """
@@ -266,17 +371,16 @@ class MetricsTracker:
                 }
             }
         """
-        summary = {}
-        for metric_name, entries in self.metrics.items():
-            values = [e["value"] for e in entries]
-            if values:
-                summary[metric_name] = {
-                    "count": len(values),
-                    "average": sum(values) / len(values),
-                    "min": min(values),
-                    "max": max(values)
+        with self._lock:
+            return {
+                metric_name: {
+                    "count": stats["count"],
+                    "average": stats["sum"] / stats["count"],
+                    "min": stats["min"],
+                    "max": stats["max"]
                 }
-        return summary
+                for metric_name, stats in self._stats.items()
+            }
 
 
 # Global metrics tracker instance